@@ -0,0 +1,116 @@
+import argparse
+import json
+import sqlite3
+import time
+import timeit
+import zlib
+
+import twse_json
+import twse_parser
+from twse_mock_server import stock_codes, stock_day_payload, mi_index_payload
+
+# ----- JSON 解析與資料列建立的微效能測試 -----
+# 比較 原本的做法 (標準函式庫 json + 逐欄位複製) 與 twse_json (orjson/msgspec) + twse_parser.build_daily_rows。
+# 預設使用 twse_mock_server 產生的 STOCK_DAY / BWIBBU_d / MI_INDEX 內容; 指定 --from-cache 時改用回應快取中實際記錄的內容。
+#
+# 範例: python bench_json_decode.py
+#       python bench_json_decode.py --from-cache twse_http_cache.sqlite3
+
+def mock_payloads(stock_count):
+    """
+    產生模擬的回應內容 (bytes)
+
+    Returns:
+        dict: 端點名稱 -> [回應內容, ...]
+    """
+    etf_codes, individual_codes = stock_codes(50, stock_count)
+    return {
+        'STOCK_DAY': [json.dumps(stock_day_payload(code, "20240101"), ensure_ascii=False).encode('utf-8')
+                      for code in etf_codes + individual_codes],
+        'BWIBBU_d': [json.dumps({'stat': 'OK', 'data': [[code, f"模擬{code}", "3.21", "2023", "15.2", "1.8", "112/4"]
+                                                        for code in individual_codes]}, ensure_ascii=False).encode('utf-8')],
+        'MI_INDEX': [json.dumps(mi_index_payload(etf_codes + individual_codes, "20240102"), ensure_ascii=False).encode('utf-8')],
+    }
+
+def cached_payloads(cache_path):
+    """
+    從回應快取 (twse_http_cache.sqlite3) 讀出實際記錄的回應內容
+    """
+    payloads = {}
+    conn = sqlite3.connect(cache_path)
+    for url, body in conn.execute("SELECT url, body FROM responses"):
+        endpoint = url.split('?', 1)[0].rsplit('/', 1)[-1]
+        payloads.setdefault(endpoint, []).append(zlib.decompress(body))
+    conn.close()
+    return payloads
+
+def copy_rows_per_field(daily_data, stock_code, stock_name, stock_category):
+    """
+    原本的資料列建立方式 (逐欄位複製)
+    """
+    rows = []
+    for day_data in daily_data:
+        csv_row = [
+            day_data[0],
+            stock_code,
+            stock_name,
+            stock_category,
+            day_data[1],
+            day_data[2],
+            day_data[3],
+            day_data[4],
+            day_data[5],
+            day_data[6],
+            day_data[7],
+            day_data[8]
+        ]
+        rows.append(csv_row)
+    return rows
+
+def time_rows(build_rows, bodies):
+    """
+    量測一種資料列建立方式處理所有回應的時間 (秒)
+    """
+    decoded = [twse_json.loads(body).get('data') or [] for body in bodies]
+    start_time = time.perf_counter()
+    for data in decoded:
+        build_rows(data, "2330", "台積電", "個股")
+    return time.perf_counter() - start_time
+
+def best_time(func, repeat):
+    """
+    執行多次取最短時間 (秒)
+    """
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+def run(payloads, repeat):
+    results = []
+    for endpoint, bodies in sorted(payloads.items()):
+        total_bytes = sum(len(body) for body in bodies)
+        old_decode = best_time(lambda: [json.loads(body.decode('utf-8')) for body in bodies], repeat)
+        new_decode = best_time(lambda: [twse_json.loads(body) for body in bodies], repeat)
+        results.append((f"{endpoint} 解析", len(bodies), total_bytes, old_decode, new_decode))
+
+        if endpoint == 'STOCK_DAY':
+            # build_daily_rows 會修改傳入的資料列, 每次計時前重新解析 (解析時間不計入)
+            old_rows = min(time_rows(copy_rows_per_field, bodies) for _ in range(repeat))
+            new_rows = min(time_rows(twse_parser.build_daily_rows, bodies) for _ in range(repeat))
+            results.append(("STOCK_DAY 資料列", len(bodies), total_bytes, old_rows, new_rows))
+
+    print(f"JSON 解析: json -> {twse_json.BACKEND}")
+    print(f"{'項目':<16}{'回應數':>8}{'KB':>10}{'原本 ms':>12}{'新版 ms':>12}{'加速':>8}")
+    for name, count, total_bytes, old_seconds, new_seconds in results:
+        speedup = old_seconds / new_seconds if new_seconds else float('inf')
+        print(f"{name:<16}{count:>8}{total_bytes / 1024:>10.1f}{old_seconds * 1000:>12.2f}{new_seconds * 1000:>12.2f}{speedup:>7.2f}x")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="JSON 解析與資料列建立的微效能測試")
+    parser.add_argument('--from-cache', help="使用回應快取 (twse_http_cache.sqlite3) 中記錄的實際回應")
+    parser.add_argument('--stocks', type=int, default=1000, help="模擬個股數量 (預設 1000)")
+    parser.add_argument('--repeat', type=int, default=5, help="重複次數, 取最短時間 (預設 5)")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    payloads = cached_payloads(args.from_cache) if args.from_cache else mock_payloads(args.stocks)
+    run(payloads, args.repeat)
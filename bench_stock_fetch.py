@@ -0,0 +1,224 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+try:
+    import resource
+except ImportError: # Windows 沒有 resource 模組, 改用 psutil
+    resource = None
+
+try:
+    import psutil
+except ImportError: # 選用: Windows 上未安裝 psutil 時不回報最大記憶體用量
+    psutil = None
+
+import stock_fetch_proxt_003 as fetcher
+from twse_rate_limiter import AdaptiveRateLimiter
+from twse_fetch_engine import iter_fetch_results
+
+# ----- 抓取程式效能測試: 對本地 TWSE 模擬伺服器 (twse_mock_server.py) 執行 stock_fetch_proxt_003 的抓取函式 -----
+# 回報 requests/sec、請求延遲 p50/p99、重試次數與最大記憶體用量 (RSS), 每次調整抓取效能後都可離線驗證。
+#
+# 範例: python bench_stock_fetch.py --stocks 100 --months 12 --workers 8 --rps 50 --latency 0.05 --error-rate 0.02
+
+def peak_rss_mb():
+    """
+    本行程的最大記憶體用量 (MB), 無法取得時返回 None
+    """
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1) # macOS 單位為 bytes, Linux 為 KB
+    if psutil is not None:
+        memory = psutil.Process().memory_info()
+        return round(getattr(memory, 'peak_wset', memory.rss) / (1024 * 1024), 1) # Windows 的 peak_wset 為最大工作集
+    return None
+
+def find_free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_mock_server(args):
+    """
+    以子行程啟動模擬伺服器 (避免伺服器的記憶體用量算進抓取程式的 RSS)
+
+    Returns:
+        tuple: (子行程, 伺服器網址)
+    """
+    port = find_free_port()
+    command = [
+        sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "twse_mock_server.py"),
+        '--port', str(port),
+        '--latency', str(args.latency),
+        '--error-rate', str(args.error_rate),
+        '--throttle-rate', str(args.throttle_rate),
+        '--malformed-rate', str(args.malformed_rate),
+        '--etf-count', str(args.etf_count),
+        '--stock-count', str(max(args.stocks, 1)),
+        '--seed', str(args.seed),
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            requests.get(f"{base_url}/__stats", timeout=1)
+            return process, base_url
+        except requests.exceptions.RequestException:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("模擬伺服器啟動失敗")
+
+def point_fetcher_at(base_url):
+    """
+    將抓取程式的 TWSE 網址改為模擬伺服器
+    """
+    fetcher.etf_url = f"{base_url}/rwd/zh/ETF/domestic?response=json"
+    fetcher.stock_url = f"{base_url}/zh/exchangeReport/BWIBBU_d?response=json"
+    fetcher.daily_trading_url = f"{base_url}/rwd/zh/afterTrading/STOCK_DAY?"
+    fetcher.market_daily_url = f"{base_url}/rwd/zh/afterTrading/MI_INDEX?"
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def year_months(count, end_year_month="202412"):
+    year, month = int(end_year_month[:4]), int(end_year_month[4:])
+    result = []
+    for _ in range(count):
+        result.append(f"{year}{month:02d}")
+        month -= 1
+        if month == 0:
+            year, month = year - 1, 12
+    return list(reversed(result))
+
+def run_benchmark(args, base_url):
+    """
+    執行一次抓取並收集效能數據
+
+    Returns:
+        dict: 效能報告
+    """
+    point_fetcher_at(base_url)
+    fetcher.twse_http.default_pool.configure(pool_maxsize=args.workers)
+    rate_limiter = AdaptiveRateLimiter(args.rps, min_rate=max(args.rps / 100, 0.01), max_rate=args.rps * 2)
+
+    # 以計時包裝 requests.Session.request (抓取程式經由 twse_http 的 Session 送出請求),
+    # 量測每一個 HTTP 請求 (含重試, 不含速率限制的等待) 的延遲
+    latencies = []
+    latency_lock = threading.Lock()
+    original_request = requests.Session.request
+
+    def timed_request(*a, **kw):
+        start_time = time.perf_counter()
+        try:
+            return original_request(*a, **kw)
+        finally:
+            with latency_lock:
+                latencies.append(time.perf_counter() - start_time)
+
+    requests.Session.request = timed_request
+    output = io.StringIO() if args.quiet else sys.stdout
+    try:
+        with contextlib.redirect_stdout(output):
+            etf_list = fetcher.get_etf_data(rate_limiter=rate_limiter) or []
+            stock_list = fetcher.get_stock_data(rate_limiter=rate_limiter) or []
+        stock_codes = [row[0] for row in etf_list + stock_list][:args.stocks]
+        work_units = [(code, year_month) for code in stock_codes for year_month in year_months(args.months)]
+
+        def fetch_unit(work_unit):
+            code, year_month = work_unit
+            return fetcher.get_daily_trading_data(code, year_month, retry_delay=args.retry_delay, rate_limiter=rate_limiter)
+
+        ok_units = 0
+        failed_units = 0
+        rows = 0
+        start_time = time.perf_counter()
+        with contextlib.redirect_stdout(output):
+            for _, daily_data in iter_fetch_results(work_units, fetch_unit, args.workers):
+                if daily_data is None:
+                    failed_units += 1
+                else:
+                    ok_units += 1
+                    rows += len(daily_data)
+        elapsed = time.perf_counter() - start_time
+    finally:
+        requests.Session.request = original_request
+        fetcher.twse_http.default_pool.close()
+
+    server_stats = requests.get(f"{base_url}/__stats", timeout=5).json()
+    stock_day_stats = server_stats.get('STOCK_DAY', {})
+    stock_day_requests = sum(stock_day_stats.values())
+    with latency_lock:
+        sorted_latencies = sorted(latencies)
+    return {
+        'units': len(work_units),
+        'ok_units': ok_units,
+        'failed_units': failed_units,
+        'rows': rows,
+        'elapsed_sec': round(elapsed, 3),
+        'requests': stock_day_requests,
+        'requests_per_sec': round(stock_day_requests / elapsed, 2) if elapsed else 0.0,
+        'latency_p50_ms': round(percentile(sorted_latencies, 0.50) * 1000, 2),
+        'latency_p99_ms': round(percentile(sorted_latencies, 0.99) * 1000, 2),
+        'retries': max(0, stock_day_requests - len(work_units)),
+        'server_outcomes': server_stats,
+        'final_rate_per_sec': round(rate_limiter.rate, 3),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+def print_report(report):
+    print("================== 效能報告 ==================")
+    print(f"工作單位: {report['units']} (成功 {report['ok_units']}, 失敗 {report['failed_units']}), 資料列: {report['rows']}")
+    print(f"耗時: {report['elapsed_sec']} 秒, STOCK_DAY 請求: {report['requests']}, 每秒請求數: {report['requests_per_sec']}")
+    print(f"請求延遲 p50: {report['latency_p50_ms']} ms, p99: {report['latency_p99_ms']} ms")
+    print(f"重試次數: {report['retries']}, 結束時速率: 每秒 {report['final_rate_per_sec']} 次")
+    print(f"伺服器回應統計: {report['server_outcomes']}")
+    if report['peak_rss_mb'] is None:
+        print("最大記憶體用量 (RSS): 無法取得 (請安裝 psutil)")
+    else:
+        print(f"最大記憶體用量 (RSS): {report['peak_rss_mb']} MB")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="TWSE 抓取程式效能測試 (使用本地模擬伺服器)")
+    parser.add_argument('--stocks', type=int, default=50, help="抓取股票數")
+    parser.add_argument('--months', type=int, default=6, help="每檔抓取月份數")
+    parser.add_argument('--workers', type=int, default=8, help="同時進行中的請求數")
+    parser.add_argument('--rps', type=float, default=50.0, help="初始每秒請求數")
+    parser.add_argument('--retry-delay', type=float, default=0.2, help="get_daily_trading_data 的重試間隔秒數")
+    parser.add_argument('--latency', type=float, default=0.02, help="模擬伺服器平均延遲秒數")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="5xx 錯誤機率")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="限流頁面機率")
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help="損壞 JSON 機率")
+    parser.add_argument('--etf-count', type=int, default=20, help="模擬 ETF 數量")
+    parser.add_argument('--seed', type=int, default=0, help="故障注入亂數種子")
+    parser.add_argument('--json-out', help="另外將報告輸出為 JSON 檔")
+    parser.add_argument('--quiet', action='store_true', help="不顯示抓取程式本身的輸出")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    process, base_url = start_mock_server(args)
+    try:
+        report = run_benchmark(args, base_url)
+    finally:
+        process.terminate()
+        process.wait()
+    print_report(report)
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"報告已儲存至 {args.json_out}")
+
+if __name__ == "__main__":
+    main()
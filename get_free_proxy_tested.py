@@ -1,46 +1,12 @@
 import requests
-from bs4 import BeautifulSoup
+
+import proxy_sources
 
 def get_proxy_list(url):
     """
-    從網頁抓取代理伺服器列表
+    從網頁抓取代理伺服器列表 (表格解析見 proxy_sources)
     """
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()  # 檢查請求是否成功
-
-    soup = BeautifulSoup(response.content, 'html.parser')
-    table = soup.find('table', class_='table table-striped table-bordered')
-    proxy_list = []
-    if table:
-        tbody = table.find('tbody')
-        if tbody:
-            rows = tbody.find_all('tr')
-            for row in rows:
-                cells = row.find_all('td')
-                if cells:
-                    ip_address = cells[0].text.strip()
-                    port = cells[1].text.strip()
-                    code = cells[2].text.strip()
-                    country = cells[3].text.strip()
-                    anonymity = cells[4].text.strip()
-                    google = cells[5].text.strip()
-                    https_type = "https" if cells[6].find('i', class_='fa fa-check text-success') else "http" # 判斷是否支援 HTTPS
-                    last_checked = cells[7].text.strip()
-
-                    proxy_list.append({
-                        'ip_address': ip_address,
-                        'port': port,
-                        'code': code,
-                        'country': country,
-                        'anonymity': anonymity,
-                        'google': google,
-                        'https': https_type,
-                        'last_checked': last_checked
-                    })
-    return proxy_list
+    return proxy_sources.fetch_source(url)
 
 def verify_proxy(proxy_data):
     """
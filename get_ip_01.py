@@ -1,34 +1,13 @@
-import requests
-from bs4 import BeautifulSoup
+import proxy_sources
 
 def get_proxy_list():
-    url = "https://www.us-proxy.org/"
-    try:
-        response = requests.get(url)
-        response.raise_for_status()  # 檢查請求是否成功
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        proxy_table = soup.find('table', class_='table table-striped table-bordered')
-        if proxy_table is None:
-            print("找不到代理列表表格。")
-            return []
-
-        ip_port_list = []
-        for row in proxy_table.tbody.find_all('tr'): # 直接在 tbody 下搜尋 tr
-            columns = row.find_all('td')
-            if len(columns) >= 2: # 確保至少有 IP 和 Port 兩欄
-                ip_address = columns[0].text.strip()
-                port = columns[1].text.strip()
-                ip_port_list.append({'ip_address': ip_address, 'port': port})
-
-        return ip_port_list
-
-    except requests.exceptions.RequestException as e:
-        print(f"網頁請求錯誤: {e}")
-        return []
-    except Exception as e:
-        print(f"發生錯誤: {e}")
-        return []
+    """
+    從 us-proxy.org 抓取代理列表 (表格解析見 proxy_sources)
+    """
+    ip_port_list = proxy_sources.fetch_source(proxy_sources.US_PROXY)
+    if not ip_port_list:
+        print("未能從 us-proxy.org 取得代理列表。")
+    return ip_port_list
 
 if __name__ == "__main__":
     proxy_list = get_proxy_list()
@@ -1,106 +1,104 @@
-import requests
-from bs4 import BeautifulSoup
-import threading
 import time
 from datetime import datetime
+from proxy_async_checker import check_proxies
+from proxy_store import ProxyStore
+import proxy_sources
 
 def get_proxy_list(url, debug=False):
     """
-    從指定網址抓取 IP 位址和連接埠
+    從指定網址抓取 IP 位址和連接埠 (表格解析見 proxy_sources)
 
     Args:
         url (str): 要抓取的網址
         debug (bool): 是否啟用 debug 模式，預設為 False
 
     Returns:
-        list: 包含 IP 位址和連接埠的列表
+        list: 代理伺服器資料列表 (包含 ip_address 與 port)
     """
-    try:
-        if debug:
-            print(f"開始抓取：{url}")
-        response = requests.get(url)
-        response.raise_for_status()  # 若 HTTP 請求失敗，拋出例外
-        soup = BeautifulSoup(response.content, 'html.parser')
-        proxy_list = []
-        table = soup.find('table', {'class': 'table table-striped table-bordered'})
-        if table:
-            rows = table.find_all('tr')
-            for i, row in enumerate(rows[1:]):  # 跳過表頭
-                cols = row.find_all('td')
-                if len(cols) >= 2:
-                    ip_address = cols[0].text.strip()
-                    port = cols[1].text.strip()
-                    proxy_list.append({'ip_address': ip_address, 'port': port})
-                    if debug:
-                        print(f"已抓取：{ip_address}:{port} ({i+1}/{len(rows)-1})")
-        if debug:
-            print(f"抓取完成，共 {len(proxy_list)} 個代理伺服器")
-        return proxy_list
-    except requests.exceptions.RequestException as e:
-        print(f"抓取失敗：{e}")
-        return []
+    if debug:
+        print(f"開始抓取：{url}")
+    proxy_list = proxy_sources.fetch_source(url)
+    if debug:
+        for i, proxy in enumerate(proxy_list):
+            print(f"已抓取：{proxy['ip_address']}:{proxy['port']} ({i+1}/{len(proxy_list)})")
+        print(f"抓取完成，共 {len(proxy_list)} 個代理伺服器")
+    return proxy_list
 
-def test_proxy_ip(ip, port, results, debug=False):
-    proxies = {
-        'http': f'http://{ip}:{port}',
-        'https': f'https://{ip}:{port}'
-    }
-    try:
-        if debug:
-            print(f"測試 IP：{ip}:{port} (連線測試)")
-        response = requests.get('http://www.example.com', proxies=proxies, timeout=5)
-        if response.status_code == 200:
-            results.append(f'Proxy IP {ip}:{port} is available')
-        else:
-            results.append(f'Proxy IP {ip}:{port} is not available (status code: {response.status_code})')
-    except Exception as e:
-        results.append(f'Proxy IP {ip}:{port} is not available (error: {e})')
+def format_check_result(result):
+    """
+    將 proxy_async_checker 的檢查結果轉成與原本相同格式的結果文字
+
+    Returns:
+        list: 結果文字列表
+    """
+    ip, port = result['ip'], result['port']
+    if not result['available']:
+        error = result['error'] or ''
+        detail = error if error.startswith('status code') else f"error: {error}"
+        return [f'Proxy IP {ip}:{port} is not available ({detail})']
+    messages = [f'Proxy IP {ip}:{port} is available']
+    if result['anonymous'] is True:
+        messages.append(f'Proxy IP {ip}:{port} is anonymous ({result["anonymity"]})')
+    elif result['anonymous'] is False:
+        messages.append(f'Proxy IP {ip}:{port} is not anonymous')
+    else:
+        messages.append(f'Proxy IP {ip}:{port} anonymity test failed')
+    return messages
+
+def test_proxy_ips(proxy_ips, debug=False, concurrency=100, judge_url=None, proxy_store=None):
+    """
+    以 asyncio 檢查所有 proxy (同時最多 concurrency 個, 先 TCP 連線再 HTTP 請求, 各自有逾時),
+    取代原本每個 proxy 開兩個執行緒; 可用的 proxy 一檢查完就印出
 
-def test_proxy_anonymity(ip, port, results, debug=False):
-    proxies = {
-        'http': f'http://{ip}:{port}',
-        'https': f'https://{ip}:{port}'
-    }
-    try:
-        if debug:
-            print(f"測試 IP：{ip}:{port} (匿名性測試)")
-        response = requests.get('http://ip-api.com/json', proxies=proxies, timeout=5)
-        data = response.json()
-        if data['query'] != requests.get('http://ip-api.com/json').json()['query']: # 比較代理IP與真實IP
-            results.append(f'Proxy IP {ip}:{port} is anonymous')
-        else:
-            results.append(f'Proxy IP {ip}:{port} is not anonymous')
-    except Exception as e:
-        results.append(f'Proxy IP {ip}:{port} anonymity test failed (error: {e})')
+    Args:
+        proxy_ips (list): [(ip, port), ...]
+        debug (bool): 是否同時印出不可用的 proxy
+        concurrency (int): 同時檢查的 proxy 數量上限
+        judge_url (str, optional): 自架 proxy judge 的網址 (python proxy_judge.py), 可偵測透明 proxy
+        proxy_store (ProxyStore, optional): 每個檢查結果 (含延遲) 寫入 proxy 資料庫
 
-def test_proxy_ips(proxy_ips, debug=False):
+    Returns:
+        list: 結果文字列表
+    """
     results = []
-    threads = []
-    for i, (ip, port) in enumerate(proxy_ips):
-        t1 = threading.Thread(target=test_proxy_ip, args=(ip, port, results, debug))
-        t2 = threading.Thread(target=test_proxy_anonymity, args=(ip, port, results, debug))
-        threads.append(t1)
-        threads.append(t2)
-        t1.start()
-        t2.start()
-        if debug:
-            print(f"已啟動測試執行緒：{ip}:{port} ({i+1}/{len(proxy_ips)})")
-    for t in threads:
-        t.join()
+    checked = [0]
+
+    def on_result(result):
+        checked[0] += 1
+        if proxy_store:
+            latency = (result['connect_time'] or 0) + (result['http_time'] or 0) if result['available'] else None
+            proxy_store.record_check({'ip_address': result['ip'], 'port': result['port']},
+                                     result['available'], latency, result['error'])
+        messages = format_check_result(result)
+        results.extend(messages)
+        if result['available'] or debug:
+            for message in messages:
+                print(f"{message} ({checked[0]}/{len(proxy_ips)})" if debug else message)
+
+    check_proxies(proxy_ips, on_result, concurrency=concurrency, judge_url=judge_url)
     return results
 
 if __name__ == "__main__":
     url = "https://free-proxy-list.net/anonymous-proxy.html"
     debug_mode = True  # 設定為 True 以啟用 debug 模式
+    judge_url = None  # 自架的 proxy judge (python proxy_judge.py --port 8899), 例如 "http://你的主機:8899/"
+    proxy_ttl = 30 * 60  # 這段時間內檢查過的 proxy 沿用上次結果 (proxy_store.sqlite3), 不再重新檢查
     proxies = get_proxy_list(url, debug_mode)
     if proxies:
+        store = ProxyStore()
+        store.record_seen(proxies, url)
+        proxies, fresh_valid, fresh_invalid = store.split_by_ttl(proxies, proxy_ttl)
+        for proxy, _ in fresh_valid:
+            print(f"Proxy IP {proxy['ip_address']}:{proxy['port']} is available (近期已檢查)")
+        print(f"沿用近期檢查結果: 可用 {len(fresh_valid)} 個, 不可用 {fresh_invalid} 個; 需重新檢查 {len(proxies)} 個")
         proxy_ips = [(proxy['ip_address'], proxy['port']) for proxy in proxies]
-        results = test_proxy_ips(proxy_ips, debug_mode)
+        results = [f"Proxy IP {proxy['ip_address']}:{proxy['port']} is available" for proxy, _ in fresh_valid]
+        results += test_proxy_ips(proxy_ips, debug_mode, judge_url=judge_url, proxy_store=store)
+        store.close()
         now = datetime.now()
         filename = f"proxy_results_{now.strftime('%y%m%d%H%M')}.txt"  # 使用 yymmddhhrr 格式命名檔案
         with open(filename, "w") as f:
-            for result in results:
-                print(result)
+            for result in results: # 結果已在檢查時即時印出
                 f.write(result + "\n")
         print(f"結果已儲存至：{filename}")  # 印出儲存的檔案名稱
     else:
@@ -0,0 +1,201 @@
+import asyncio
+import json
+import time
+from urllib.parse import urlparse
+
+import proxy_judge
+
+# ----- 非同步 proxy 檢查 (asyncio, 只用標準函式庫) -----
+# 每個 proxy 分兩個階段檢查, 各自有逾時: 先建立 TCP 連線, 連得上才經由 proxy 送出 HTTP 請求。
+# 以 BoundedSemaphore 限制同時檢查的數量, 同時開啟的連線數 (檔案描述子) 與記憶體用量不隨 proxy 數量增加;
+# 結果一完成就送出, 不必等全部檢查完。匿名等級由 proxy_judge 判斷 (本機對外 IP 只查詢一次)。
+
+TEST_URL_HOST = "www.example.com"
+DEFAULT_JUDGE_URL = proxy_judge.PUBLIC_IP_SERVICES[0][0] # 未自架 judge 時使用 ip-api.com (只能判斷是否透明)
+MAX_BODY_BYTES = 64 * 1024 # 回應內容最多讀取的位元組數
+
+async def http_get(reader, writer, host, target, timeout, max_body_bytes=MAX_BODY_BYTES):
+    """
+    在已建立的連線上送出 HTTP/1.0 GET 並讀取回應 (HTTP/1.0 不使用 chunked 編碼, 讀到連線關閉為止)
+
+    Args:
+        reader, writer: asyncio.open_connection 的回傳值
+        host (str): Host 標頭
+        target (str): 請求目標 (直接連線為路徑, 經由 proxy 時為完整網址)
+        timeout (float): 整個請求的逾時秒數
+        max_body_bytes (int): 最多讀取的內容位元組數
+
+    Returns:
+        tuple: (狀態碼, 標頭 dict (小寫鍵名), 內容 bytes)
+    """
+    async def request():
+        writer.write(
+            f"GET {target} HTTP/1.0\r\nHost: {host}\r\nUser-Agent: Mozilla/5.0\r\nAccept: */*\r\nConnection: close\r\n\r\n".encode()
+        )
+        await writer.drain()
+        status_line = await reader.readline()
+        parts = status_line.decode('latin-1').split()
+        if len(parts) < 2 or not parts[0].startswith('HTTP/') or not parts[1].isdigit():
+            raise ValueError(f"不是 HTTP 回應: {status_line[:50]!r}")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        body = b''
+        while len(body) < max_body_bytes:
+            chunk = await reader.read(max_body_bytes - len(body))
+            if not chunk:
+                break
+            body += chunk
+        return int(parts[1]), headers, body
+
+    return await asyncio.wait_for(request(), timeout)
+
+async def open_tcp(host, port, timeout):
+    """
+    建立 TCP 連線 (逾時拋出 asyncio.TimeoutError)
+    """
+    return await asyncio.wait_for(asyncio.open_connection(host, int(port)), timeout)
+
+async def close_writer(writer):
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except (OSError, asyncio.TimeoutError):
+        pass
+
+async def check_proxy(ip, port, public_ip=None, connect_timeout=3, http_timeout=5, judge_url=None):
+    """
+    檢查一個 HTTP proxy
+
+    1. TCP 連線 (connect_timeout)
+    2. 經由 proxy 請求 http://www.example.com/ (http_timeout)
+    3. 可用且已知本機對外 IP 時, 經由 proxy 請求 judge (自架 judge_url 或 ip-api.com), 判斷匿名等級
+
+    Returns:
+        dict: {'ip', 'port', 'available', 'anonymous' (未檢查為 None), 'anonymity' (proxy_judge 的等級),
+               'connect_time', 'http_time', 'error'}
+    """
+    result = {'ip': ip, 'port': port, 'available': False, 'anonymous': None, 'anonymity': None,
+              'connect_time': None, 'http_time': None, 'error': None}
+    start_time = time.monotonic()
+    try:
+        reader, writer = await open_tcp(ip, port, connect_timeout)
+    except asyncio.TimeoutError:
+        result['error'] = "TCP 連線逾時"
+        return result
+    except OSError as e:
+        result['error'] = f"TCP 連線失敗: {e}"
+        return result
+    result['connect_time'] = time.monotonic() - start_time
+
+    try:
+        start_time = time.monotonic()
+        status, _, _ = await http_get(reader, writer, TEST_URL_HOST, f"http://{TEST_URL_HOST}/", http_timeout)
+        result['http_time'] = time.monotonic() - start_time
+        if status != 200:
+            result['error'] = f"status code: {status}"
+            return result
+        result['available'] = True
+    except asyncio.TimeoutError:
+        result['error'] = "HTTP 請求逾時"
+        return result
+    except (OSError, ValueError) as e:
+        result['error'] = f"HTTP 請求失敗: {e}"
+        return result
+    finally:
+        await close_writer(writer)
+
+    if public_ip:
+        judge = judge_url or DEFAULT_JUDGE_URL
+        try:
+            reader, writer = await open_tcp(ip, port, connect_timeout)
+            try:
+                status, _, body = await http_get(reader, writer, urlparse(judge).netloc, judge, http_timeout)
+            finally:
+                await close_writer(writer)
+            if status == 200:
+                judge_data = json.loads(body)
+                if judge_url:
+                    result['anonymity'] = proxy_judge.classify(judge_data, public_ip)
+                else:
+                    result['anonymity'] = proxy_judge.classify_ip_echo(judge_data.get('query'), public_ip)
+                result['anonymous'] = result['anonymity'] != proxy_judge.TRANSPARENT
+        except (OSError, ValueError, asyncio.TimeoutError):
+            pass # 匿名性檢查失敗時維持 None
+    return result
+
+async def iter_check_results(proxy_ips, concurrency=100, connect_timeout=3, http_timeout=5, check_anonymity=True, judge_url=None):
+    """
+    檢查所有 proxy, 依完成順序產生結果 (async generator)
+
+    同時檢查的數量以 BoundedSemaphore 限制為 concurrency; 只有取得名額後才建立下一個檢查工作,
+    所以 proxy_ips 可以是很長的列表或 iterator。
+
+    Args:
+        proxy_ips (iterable): [(ip, port), ...]
+        concurrency (int): 同時檢查的 proxy 數量上限
+        connect_timeout (float): TCP 連線逾時秒數
+        http_timeout (float): HTTP 請求逾時秒數
+        check_anonymity (bool): 是否檢查匿名性
+        judge_url (str, optional): 自架 judge 的網址 (python proxy_judge.py), 可判斷透明 / 匿名 / 高匿
+
+    Yields:
+        dict: check_proxy 的結果
+    """
+    public_ip = None
+    if check_anonymity: # 本機對外 IP 只查詢一次 (proxy_judge 快取)
+        public_ip = await asyncio.get_running_loop().run_in_executor(None, proxy_judge.get_public_ip)
+    semaphore = asyncio.BoundedSemaphore(concurrency)
+    results = asyncio.Queue(maxsize=concurrency) # 結果還沒被取走時, 檢查工作會等待, 不會無限累積
+    done_marker = object()
+
+    async def run_one(ip, port):
+        try:
+            await results.put(await check_proxy(ip, port, public_ip, connect_timeout, http_timeout, judge_url))
+        except Exception as e:
+            await results.put({'ip': ip, 'port': port, 'available': False, 'anonymous': None, 'anonymity': None,
+                               'connect_time': None, 'http_time': None, 'error': str(e)})
+        finally:
+            semaphore.release()
+
+    async def produce():
+        tasks = set()
+        for ip, port in proxy_ips:
+            await semaphore.acquire() # 同時進行中的檢查達上限時在這裡等待
+            task = asyncio.ensure_future(run_one(ip, port))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+        await results.put(done_marker)
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            result = await results.get()
+            if result is done_marker:
+                break
+            yield result
+    finally:
+        producer.cancel()
+
+def check_proxies(proxy_ips, on_result=None, **kwargs):
+    """
+    同步介面: 檢查所有 proxy, 每完成一個就呼叫 on_result(result)
+
+    Returns:
+        list: 所有結果 (完成順序)
+    """
+    async def run():
+        collected = []
+        async for result in iter_check_results(proxy_ips, **kwargs):
+            collected.append(result)
+            if on_result:
+                on_result(result)
+        return collected
+
+    return asyncio.run(run())
@@ -0,0 +1,178 @@
+import argparse
+import ipaddress
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+# ----- Proxy judge: 判斷 proxy 的匿名等級 -----
+# 本機對外 IP 每次執行只查詢一次並快取, 之後每個 proxy 的回應都與它比較, 不再每測一個 proxy 就直接連線查一次。
+# 自架的 judge 端點 (python proxy_judge.py --port 8899) 會回傳它看到的連線來源與所有請求標頭,
+# 可由 X-Forwarded-For / Via 等標頭判斷透明 proxy; judge 需架在 proxy 連得到的主機上 (有對外 IP)。
+
+TRANSPARENT = "transparent" # 目標網站看得到我們的真實 IP
+ANONYMOUS = "anonymous" # 看不到真實 IP, 但看得出有經過 proxy (Via / X-Forwarded-For 等標頭)
+ELITE = "elite" # 看不到真實 IP, 也沒有 proxy 標頭
+
+# 會透露經過 proxy (或透露真實 IP) 的標頭
+PROXY_HEADERS = (
+    'via', 'x-forwarded-for', 'forwarded', 'x-real-ip', 'client-ip', 'x-client-ip',
+    'x-forwarded', 'forwarded-for', 'x-proxy-id', 'proxy-connection', 'x-originating-ip',
+)
+
+# 查詢本機對外 IP 的服務: (網址, JSON 欄位)
+PUBLIC_IP_SERVICES = [
+    ("http://ip-api.com/json", "query"),
+    ("https://api.ipify.org?format=json", "ip"),
+]
+
+# 標頭值中分隔 IP 的字元 (例如 X-Forwarded-For: a, b / Forwarded: for="[v6]:port";by=...)
+HEADER_TOKEN_SEPARATORS = re.compile(r'[\s,;="\[\]]+')
+
+_public_ip = None
+_public_ip_lock = threading.Lock()
+
+def get_public_ip(refresh=False, timeout=5):
+    """
+    取得本機直接連線的對外 IP (每次執行只查詢一次, 之後使用快取; 多執行緒同時呼叫也只查詢一次)
+
+    Args:
+        refresh (bool): True 時重新查詢
+        timeout (float): 每個查詢服務的逾時秒數
+
+    Returns:
+        str: 對外 IP, 所有查詢服務都失敗時返回 None
+    """
+    global _public_ip
+    with _public_ip_lock:
+        if _public_ip and not refresh:
+            return _public_ip
+        for url, field in PUBLIC_IP_SERVICES:
+            try:
+                _public_ip = requests.get(url, timeout=timeout).json()[field]
+                return _public_ip
+            except (requests.exceptions.RequestException, ValueError, KeyError):
+                continue
+        return None
+
+def header_ips(value):
+    """
+    取出標頭值中的所有 IP (可帶埠號, 例如 1.2.3.4:8080)
+
+    Returns:
+        set: ipaddress.IPv4Address / IPv6Address 集合
+    """
+    ips = set()
+    for token in HEADER_TOKEN_SEPARATORS.split(value):
+        candidates = [token]
+        if token.count(':') == 1: # IPv4:埠號
+            candidates.append(token.split(':')[0])
+        for candidate in candidates:
+            try:
+                ips.add(ipaddress.ip_address(candidate))
+                break
+            except ValueError:
+                continue
+    return ips
+
+def classify(judge_data, public_ip):
+    """
+    依 judge 端點的回應判斷匿名等級
+
+    Args:
+        judge_data (dict): judge 回應 {'remote_addr': 來源 IP, 'headers': {標頭: 值}}
+        public_ip (str): 本機對外 IP
+
+    Returns:
+        str: TRANSPARENT / ANONYMOUS / ELITE
+    """
+    headers = {name.lower(): str(value) for name, value in (judge_data.get('headers') or {}).items()}
+    if public_ip:
+        try:
+            own_ip = ipaddress.ip_address(public_ip)
+        except ValueError:
+            own_ip = None
+        # 比對標頭中解析出的 IP, 不用子字串比對 (避免 1.2.3.4 誤判 11.2.3.45)
+        if judge_data.get('remote_addr') == public_ip or (own_ip and any(own_ip in header_ips(value) for value in headers.values())):
+            return TRANSPARENT
+    if any(name in headers for name in PROXY_HEADERS):
+        return ANONYMOUS
+    return ELITE
+
+def classify_ip_echo(seen_ip, public_ip):
+    """
+    只知道目標網站看到的 IP 時 (例如 ip-api.com) 的判斷: 無法分辨 ANONYMOUS 與 ELITE, 一律視為 ANONYMOUS
+    """
+    return TRANSPARENT if seen_ip == public_ip else ANONYMOUS
+
+def judge_proxy(proxies, judge_url=None, public_ip=None, timeout=5):
+    """
+    經由 proxy 請求 judge (未指定 judge_url 時使用 ip-api.com), 判斷匿名等級
+
+    Args:
+        proxies (dict): requests 的 proxies 參數
+        judge_url (str, optional): 自架 judge 的網址
+        public_ip (str, optional): 本機對外 IP (預設使用 get_public_ip 的快取)
+        timeout (float): 逾時秒數
+
+    Returns:
+        str: TRANSPARENT / ANONYMOUS / ELITE
+
+    Raises:
+        requests.exceptions.RequestException: 請求失敗
+        ValueError: 回應不是 JSON
+    """
+    public_ip = public_ip or get_public_ip()
+    if judge_url:
+        return classify(requests.get(judge_url, proxies=proxies, timeout=timeout).json(), public_ip)
+    return classify_ip_echo(requests.get(PUBLIC_IP_SERVICES[0][0], proxies=proxies, timeout=timeout).json().get('query'), public_ip)
+
+class JudgeServer:
+    """
+    本地 judge 端點: 任何 GET 請求都回傳 JSON {'remote_addr': 連線來源 IP, 'headers': 請求標頭}
+
+    Args:
+        host (str): 監聽位址 (要讓外部 proxy 連入時使用 0.0.0.0)
+        port (int): 監聽埠號 (0 表示自動選擇)
+    """
+
+    def __init__(self, host='0.0.0.0', port=0):
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                body = json.dumps({'remote_addr': self.client_address[0], 'headers': dict(self.headers.items())}).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Proxy judge 端點: 回傳請求來源與標頭, 供判斷 proxy 匿名等級")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8899)
+    args = parser.parse_args()
+    server = JudgeServer(args.host, args.port)
+    print(f"Proxy judge 執行中: http://{args.host}:{server.port}/ (Ctrl-C 結束)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,150 @@
+import random
+import threading
+import time
+
+# ----- 代理伺服器池: 紀錄每個 proxy 的健康狀態, 依分數加權挑選, 連續失敗的 proxy 暫時隔離 -----
+
+def proxy_key(proxy_data):
+    """
+    代理伺服器識別字串 (ip:port)
+    """
+    return f"{proxy_data['ip_address']}:{proxy_data['port']}"
+
+def supports_https(proxy_data):
+    """
+    來源網站標示是否支援 HTTPS (TWSE 網址皆為 https, 不支援的 proxy 無法用來抓取)
+    """
+    return proxy_data.get('https') == 'https'
+
+def to_requests_proxies(proxy_data):
+    """
+    轉成 requests 可用的 proxies 參數格式
+
+    http 與 https 網址都經由同一個 proxy; 原本只設定 proxy_data['https'] 對應的一種,
+    另一種網址的請求會直接連線, 卻被當成該 proxy 的成功紀錄。
+    """
+    if proxy_data is None:
+        return None
+    return {'http': proxy_key(proxy_data), 'https': proxy_key(proxy_data)}
+
+class ProxyPool:
+    """
+    代理伺服器池 (執行緒安全)
+
+    每個 proxy 紀錄成功/失敗次數、延遲的指數移動平均 (EWMA) 與連續失敗次數。
+    挑選時以 成功率 / EWMA 延遲 作為權重隨機挑選; 連續失敗達 max_consecutive_failures 次的 proxy
+    會被隔離一段時間, 每次被隔離的時間加倍 (最長 max_cooldown 秒)。
+
+    Args:
+        proxy_list (list): 代理伺服器資料列表 (get_proxy_list 的回傳格式)
+        ewma_alpha (float): 延遲 EWMA 的平滑係數
+        max_consecutive_failures (int): 連續失敗幾次後隔離
+        base_cooldown (float): 第一次隔離秒數
+        max_cooldown (float): 最長隔離秒數
+    """
+
+    def __init__(self, proxy_list=None, ewma_alpha=0.3, max_consecutive_failures=2,
+                 base_cooldown=30.0, max_cooldown=600.0):
+        self.ewma_alpha = ewma_alpha
+        self.max_consecutive_failures = max_consecutive_failures
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self.lock = threading.Lock()
+        self.proxies = {}
+        self.stats = {}
+        for proxy_data in proxy_list or []:
+            self.add(proxy_data)
+
+    def add(self, proxy_data, latency=None):
+        """
+        加入一個 proxy (已存在則忽略)
+
+        Args:
+            proxy_data (dict): 代理伺服器資料
+            latency (float, optional): 驗證時量到的延遲秒數, 作為 EWMA 初始值
+        """
+        key = proxy_key(proxy_data)
+        with self.lock:
+            if key in self.proxies:
+                return
+            self.proxies[key] = proxy_data
+            self.stats[key] = {
+                'successes': 0,
+                'failures': 0,
+                'consecutive_failures': 0,
+                'ewma_latency': latency if latency else 1.0,
+                'quarantine_count': 0,
+                'quarantined_until': 0.0,
+            }
+
+    def __len__(self):
+        return len(self.proxies)
+
+    def snapshot(self):
+        """
+        目前池中的 proxy 資料列表 (例如分給其他行程使用)
+        """
+        with self.lock:
+            return list(self.proxies.values())
+
+    def _score(self, stat):
+        success_rate = (stat['successes'] + 1) / (stat['successes'] + stat['failures'] + 2)
+        return success_rate / max(stat['ewma_latency'], 0.01)
+
+    def acquire(self):
+        """
+        依分數加權隨機挑選一個目前未被隔離的 proxy
+
+        Returns:
+            dict: 代理伺服器資料, 沒有可用的 proxy 時返回 None (呼叫端改為直接連線)
+        """
+        now = time.monotonic()
+        with self.lock:
+            candidates = [key for key, stat in self.stats.items() if stat['quarantined_until'] <= now]
+            if not candidates:
+                return None
+            weights = [self._score(self.stats[key]) for key in candidates]
+            key = random.choices(candidates, weights=weights)[0]
+            return self.proxies[key]
+
+    def report_success(self, proxy_data, latency):
+        """
+        回報一次成功的請求與其延遲秒數
+        """
+        with self.lock:
+            stat = self.stats.get(proxy_key(proxy_data))
+            if stat is None:
+                return
+            stat['successes'] += 1
+            stat['consecutive_failures'] = 0
+            stat['quarantine_count'] = 0
+            stat['ewma_latency'] = self.ewma_alpha * latency + (1 - self.ewma_alpha) * stat['ewma_latency']
+
+    def report_failure(self, proxy_data):
+        """
+        回報一次失敗 (逾時、連線錯誤或被限流), 連續失敗過多時隔離該 proxy
+        """
+        key = proxy_key(proxy_data)
+        with self.lock:
+            stat = self.stats.get(key)
+            if stat is None:
+                return
+            stat['failures'] += 1
+            stat['consecutive_failures'] += 1
+            if stat['consecutive_failures'] < self.max_consecutive_failures:
+                return
+            cooldown = min(self.max_cooldown, self.base_cooldown * (2 ** stat['quarantine_count']))
+            stat['quarantine_count'] += 1
+            stat['consecutive_failures'] = 0
+            stat['quarantined_until'] = time.monotonic() + cooldown
+        print(f"Proxy {key} 連續失敗，暫停使用 {cooldown:.0f} 秒")
+
+    def summary(self):
+        """
+        取得所有 proxy 的統計資料
+
+        Returns:
+            dict: ip:port -> 統計資料 (複本)
+        """
+        with self.lock:
+            return {key: dict(stat) for key, stat in self.stats.items()}
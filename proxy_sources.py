@@ -0,0 +1,158 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+try:
+    from selectolax.parser import HTMLParser
+except ImportError: # 選用: 未安裝 selectolax 時改用 lxml 或 BeautifulSoup
+    HTMLParser = None
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+from bs4 import BeautifulSoup
+
+# ----- 免費代理伺服器來源: 同時抓取所有來源網站, 以同一個表格解析函式取出 proxy, 邊解析邊去除重複 -----
+# 表格解析依序使用 selectolax、lxml, 都未安裝時使用 BeautifulSoup (html.parser)。
+# 輸出格式與原本的 get_proxy_list 相同:
+#   {'ip_address', 'port', 'code', 'country', 'anonymity', 'google', 'https', 'last_checked', 'source'}
+
+FREE_PROXY_LIST_ANONYMOUS = "https://free-proxy-list.net/anonymous-proxy.html"
+FREE_PROXY_LIST = "https://free-proxy-list.net/"
+US_PROXY = "https://www.us-proxy.org/"
+SOCKS_PROXY = "https://www.socks-proxy.net/"
+ALL_SOURCES = [FREE_PROXY_LIST_ANONYMOUS, FREE_PROXY_LIST, US_PROXY, SOCKS_PROXY]
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+if HTMLParser is not None:
+    BACKEND = "selectolax"
+elif lxml is not None:
+    BACKEND = "lxml"
+else:
+    BACKEND = "bs4"
+
+def iter_table_rows(html):
+    """
+    取出代理列表表格 (class 含 table-striped) 的每一列資料
+
+    Args:
+        html (str | bytes): 網頁內容
+
+    Yields:
+        list: [(儲存格文字, 是否含勾選圖示 fa-check), ...]
+    """
+    if BACKEND == "selectolax":
+        table = HTMLParser(html).css_first("table.table-striped")
+        if table is None:
+            return
+        for row in table.css("tbody tr"):
+            yield [(cell.text(strip=True), cell.css_first("i.fa-check") is not None) for cell in row.css("td")]
+    elif BACKEND == "lxml":
+        tables = lxml.html.fromstring(html).xpath("//table[contains(concat(' ', @class, ' '), ' table-striped ')]")
+        if not tables:
+            return
+        for row in tables[0].xpath("./tbody/tr"):
+            yield [(cell.text_content().strip(), bool(cell.xpath(".//i[contains(@class, 'fa-check')]")))
+                   for cell in row.xpath("./td")]
+    else:
+        table = BeautifulSoup(html, 'html.parser').find('table', class_='table-striped')
+        if table is None or table.tbody is None:
+            return
+        for row in table.tbody.find_all('tr'):
+            yield [(cell.text.strip(), cell.find('i', class_='fa-check') is not None) for cell in row.find_all('td')]
+
+def row_to_proxy(cells, source):
+    """
+    表格資料列 -> 代理伺服器資料 (欄位不足 8 個時返回 None)
+
+    free-proxy-list 系列網站的 Https 欄為勾選圖示或 yes/no 文字;
+    socks-proxy.net 沒有 Https 欄, 與原本一樣視為 http。
+    """
+    if len(cells) < 8:
+        return None
+    texts = [text for text, _ in cells]
+    if "socks-proxy" in source:
+        https_type = "http"
+    else:
+        https_type = "https" if cells[6][1] or texts[6].lower() == "yes" else "http"
+    return {
+        'ip_address': texts[0],
+        'port': texts[1],
+        'code': texts[2],
+        'country': texts[3],
+        'anonymity': texts[4],
+        'google': texts[5],
+        'https': https_type,
+        'last_checked': texts[7],
+        'source': source,
+    }
+
+def parse_proxy_table(html, source):
+    """
+    解析來源網站的代理列表
+
+    Returns:
+        list: 代理伺服器資料列表
+    """
+    return [proxy for proxy in (row_to_proxy(cells, source) for cells in iter_table_rows(html)) if proxy]
+
+def fetch_source(url, timeout=15):
+    """
+    抓取並解析一個來源網站 (失敗時印出錯誤並返回空列表)
+
+    Returns:
+        list: 代理伺服器資料列表
+    """
+    try:
+        response = requests.get(url, headers=HEADERS, timeout=timeout)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print(f"抓取網址 {url} 時發生錯誤: {e}")
+        return []
+    return parse_proxy_table(response.content, url)
+
+def iter_proxies(urls=None, timeout=15, on_source=None):
+    """
+    同時抓取所有來源網站, 依完成順序產生不重複的代理伺服器資料 (以 (ip, port, https) 去除重複)
+
+    Args:
+        urls (list, optional): 來源網址列表, 預設為 ALL_SOURCES
+        timeout (float): 每個網站的逾時秒數
+        on_source (callable, optional): on_source(url, proxy_list), 每個網站解析完成 (去除重複前) 就呼叫
+
+    Yields:
+        dict: 代理伺服器資料 ('source' 為第一個列出它的網站)
+    """
+    urls = urls or ALL_SOURCES
+    seen = set()
+    with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+        futures = {executor.submit(fetch_source, url, timeout): url for url in urls}
+        for future in as_completed(futures):
+            proxy_list = future.result()
+            if on_source:
+                on_source(futures[future], proxy_list)
+            for proxy_data in proxy_list:
+                key = (proxy_data['ip_address'], proxy_data['port'], proxy_data['https'])
+                if key not in seen:
+                    seen.add(key)
+                    yield proxy_data
+
+def fetch_proxies(urls=None, timeout=15, on_source=None):
+    """
+    同 iter_proxies, 返回列表
+    """
+    return list(iter_proxies(urls, timeout, on_source))
+
+if __name__ == "__main__":
+    def report(url, proxy_list):
+        print(f"從 {url} 抓取到 {len(proxy_list)} 個代理伺服器。")
+
+    proxies = fetch_proxies(on_source=report)
+    print(f"移除重複代理伺服器後，共 {len(proxies)} 個 (表格解析: {BACKEND})。")
+    for proxy_data in proxies:
+        print(f"{proxy_data['ip_address']}:{proxy_data['port']} | {proxy_data['https']} | {proxy_data['anonymity']} | {proxy_data['source']}")
@@ -0,0 +1,202 @@
+import json
+import sqlite3
+import threading
+import time
+
+from proxy_pool import proxy_key
+
+# ----- 代理伺服器資料庫 (SQLite): 跨執行保留每個 proxy 的出現紀錄、來源網站與每次驗證結果 -----
+# 最近 ttl 秒內驗證過的 proxy 直接沿用上次結果, 只重新驗證過期或新出現的 proxy;
+# 待驗證的 proxy 依歷史可用率排序, 過去常常可用的先驗證。
+
+DEFAULT_DB_PATH = "proxy_store.sqlite3"
+DEFAULT_TTL_SECONDS = 30 * 60
+
+def uptime_of(successes, checks):
+    """
+    歷史可用率 (加上先驗值, 沒有驗證紀錄的 proxy 為 0.5)
+    """
+    return (successes + 1) / (checks + 2)
+
+class ProxyStore:
+    """
+    代理伺服器資料庫 (執行緒安全)
+
+    Args:
+        db_path (str): SQLite 檔案路徑
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS proxies ("
+            " proxy TEXT PRIMARY KEY," # ip:port
+            " proxy_json TEXT NOT NULL," # 最近一次抓到的代理伺服器資料 (get_proxy_list 格式)
+            " sources TEXT NOT NULL," # 出現過的來源網站 (以換行分隔)
+            " first_seen REAL NOT NULL,"
+            " last_seen REAL NOT NULL,"
+            " last_checked REAL,"
+            " last_ok INTEGER,"
+            " checks INTEGER NOT NULL DEFAULT 0,"
+            " successes INTEGER NOT NULL DEFAULT 0,"
+            " avg_latency REAL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS checks ("
+            " proxy TEXT NOT NULL,"
+            " checked_at REAL NOT NULL,"
+            " ok INTEGER NOT NULL,"
+            " latency REAL,"
+            " error TEXT)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS checks_proxy ON checks (proxy, checked_at)")
+        self.conn.commit()
+
+    def record_seen(self, proxy_list, source):
+        """
+        紀錄從來源網站抓到的 proxy (新的 proxy 紀錄 first_seen, 已存在的更新 last_seen 與資料)
+
+        Args:
+            proxy_list (list): 代理伺服器資料列表
+            source (str): 來源網站網址
+        """
+        now = time.time()
+        with self.lock:
+            for proxy_data in proxy_list:
+                key = proxy_key(proxy_data)
+                row = self.conn.execute("SELECT sources FROM proxies WHERE proxy = ?", (key,)).fetchone()
+                if row is None:
+                    self.conn.execute(
+                        "INSERT INTO proxies (proxy, proxy_json, sources, first_seen, last_seen) VALUES (?, ?, ?, ?, ?)",
+                        (key, json.dumps(proxy_data, ensure_ascii=False), source, now, now)
+                    )
+                else:
+                    sources = row[0].split("\n")
+                    if source not in sources:
+                        sources.append(source)
+                    self.conn.execute(
+                        "UPDATE proxies SET proxy_json = ?, sources = ?, last_seen = ? WHERE proxy = ?",
+                        (json.dumps(proxy_data, ensure_ascii=False), "\n".join(sources), now, key)
+                    )
+            self.conn.commit()
+
+    def record_check(self, proxy_data, ok, latency=None, error=None):
+        """
+        紀錄一次驗證結果 (保留在 checks 歷史中, 並更新可用率與平均延遲)
+
+        Args:
+            proxy_data (dict): 代理伺服器資料
+            ok (bool): 是否可用
+            latency (float, optional): 驗證花費秒數
+            error (str, optional): 失敗原因
+        """
+        key = proxy_key(proxy_data)
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO proxies (proxy, proxy_json, sources, first_seen, last_seen) VALUES (?, ?, '', ?, ?)",
+                (key, json.dumps(proxy_data, ensure_ascii=False), now, now)
+            )
+            self.conn.execute(
+                "INSERT INTO checks (proxy, checked_at, ok, latency, error) VALUES (?, ?, ?, ?, ?)",
+                (key, now, int(bool(ok)), latency, error)
+            )
+            self.conn.execute(
+                "UPDATE proxies SET last_checked = ?, last_ok = ?, checks = checks + 1, successes = successes + ?,"
+                " avg_latency = CASE WHEN ? IS NULL THEN avg_latency"
+                " WHEN avg_latency IS NULL THEN ? ELSE avg_latency * 0.7 + ? * 0.3 END"
+                " WHERE proxy = ?",
+                (now, int(bool(ok)), int(bool(ok)), latency if ok else None, latency, latency, key)
+            )
+            self.conn.commit()
+
+    def split_by_ttl(self, proxy_list, ttl=DEFAULT_TTL_SECONDS):
+        """
+        依上次驗證時間分組
+
+        Args:
+            proxy_list (list): 代理伺服器資料列表
+            ttl (float): 驗證結果的有效秒數
+
+        Returns:
+            tuple: (待驗證列表 (依歷史可用率由高到低排序),
+                    近期驗證有效的 [(proxy_data, 平均延遲), ...],
+                    近期驗證失敗而略過的數量)
+        """
+        now = time.time()
+        to_check = []
+        fresh_valid = []
+        fresh_invalid = 0
+        with self.lock:
+            for proxy_data in proxy_list:
+                row = self.conn.execute(
+                    "SELECT last_checked, last_ok, checks, successes, avg_latency FROM proxies WHERE proxy = ?",
+                    (proxy_key(proxy_data),)
+                ).fetchone()
+                if row is None or row[0] is None or now - row[0] >= ttl:
+                    uptime = uptime_of(row[3], row[2]) if row else uptime_of(0, 0)
+                    to_check.append((uptime, proxy_data))
+                elif row[1]:
+                    fresh_valid.append((proxy_data, row[4]))
+                else:
+                    fresh_invalid += 1
+        to_check.sort(key=lambda item: item[0], reverse=True)
+        return [proxy_data for _, proxy_data in to_check], fresh_valid, fresh_invalid
+
+    def ranked(self, limit=None, seen_within=None):
+        """
+        依歷史可用率 (其次為平均延遲) 排序的 proxy
+
+        Args:
+            limit (int, optional): 最多返回幾個
+            seen_within (float, optional): 只列出最近這麼多秒內仍出現在來源網站的 proxy
+
+        Returns:
+            list: [{'proxy_data', 'uptime', 'checks', 'avg_latency', 'first_seen', 'last_seen', 'sources'}, ...]
+        """
+        sql = "SELECT proxy_json, checks, successes, avg_latency, first_seen, last_seen, sources FROM proxies"
+        params = []
+        if seen_within:
+            sql += " WHERE last_seen >= ?"
+            params.append(time.time() - seen_within)
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        ranked = [{
+            'proxy_data': json.loads(row[0]),
+            'uptime': uptime_of(row[2], row[1]),
+            'checks': row[1],
+            'avg_latency': row[3],
+            'first_seen': row[4],
+            'last_seen': row[5],
+            'sources': [source for source in row[6].split("\n") if source],
+        } for row in rows]
+        ranked.sort(key=lambda item: (-item['uptime'], item['avg_latency'] if item['avg_latency'] is not None else float('inf')))
+        return ranked[:limit] if limit else ranked
+
+    def history(self, proxy_data, limit=20):
+        """
+        一個 proxy 最近的驗證紀錄
+
+        Returns:
+            list: [(驗證時間, 是否可用, 延遲, 失敗原因), ...] (新的在前)
+        """
+        with self.lock:
+            return [(checked_at, bool(ok), latency, error) for checked_at, ok, latency, error in self.conn.execute(
+                "SELECT checked_at, ok, latency, error FROM checks WHERE proxy = ? ORDER BY checked_at DESC LIMIT ?",
+                (proxy_key(proxy_data), limit)
+            )]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+if __name__ == "__main__":
+    store = ProxyStore()
+    print(f"{'proxy':<24}{'可用率':>8}{'驗證次數':>10}{'平均延遲':>10}  來源")
+    for item in store.ranked(limit=30):
+        latency = f"{item['avg_latency']:.2f}s" if item['avg_latency'] is not None else "-"
+        print(f"{proxy_key(item['proxy_data']):<24}{item['uptime']:>8.0%}{item['checks']:>10}{latency:>10}  {', '.join(item['sources'])}")
+    store.close()
@@ -0,0 +1,164 @@
+import selectors
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# ----- 代理伺服器並行驗證: 以執行緒池同時驗證, 找到足夠的有效 proxy 就先返回, 其餘在背景繼續驗證 -----
+# 選用的第一階段 TCP 預先篩選: 以非阻塞 socket 同時對所有 proxy 建立連線 (短逾時),
+# 連得上的才交給完整的 HTTP/HTTPS 驗證; 大部分失效的免費 proxy 在這一步就被排除, 不再各自佔用一個驗證執行緒數秒。
+
+def start_connect(proxy_data):
+    """
+    開始非阻塞 TCP 連線
+
+    Returns:
+        socket.socket: 連線中的 socket, 無法建立連線 (位址錯誤或立即被拒) 時返回 None
+    """
+    host = proxy_data['ip_address']
+    sock = None
+    try:
+        sock = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        sock.connect((host, int(proxy_data['port'])))
+        return sock
+    except (BlockingIOError, InterruptedError): # 連線進行中 (Linux 為 EINPROGRESS, Windows 為 WSAEWOULDBLOCK), 與 asyncio 的作法相同
+        return sock
+    except (OSError, ValueError):
+        pass
+    if sock is not None:
+        sock.close()
+    return None
+
+def iter_tcp_reachable(proxy_list, timeout=2.0, max_sockets=256, on_unreachable=None):
+    """
+    TCP 預先篩選: 同時對所有 proxy 建立連線 (同時最多 max_sockets 個), 依連線成功順序產生連得上的 proxy
+
+    Args:
+        proxy_list (iterable): 代理伺服器資料列表
+        timeout (float): 每個連線的逾時秒數
+        max_sockets (int): 同時開啟的 socket 數量上限 (Windows 的 select 最多 512 個)
+        on_unreachable (callable, optional): on_unreachable(proxy_data), 連線失敗或逾時時呼叫
+
+    Yields:
+        dict: 連得上的代理伺服器資料
+    """
+    selector = selectors.DefaultSelector()
+    deadlines = {} # socket -> 逾時時間
+    pending = iter(proxy_list)
+    exhausted = False
+
+    def finish(sock):
+        selector.unregister(sock)
+        del deadlines[sock]
+        sock.close()
+
+    try:
+        while True:
+            while not exhausted and len(deadlines) < max_sockets:
+                proxy_data = next(pending, None)
+                if proxy_data is None:
+                    exhausted = True
+                    break
+                sock = start_connect(proxy_data)
+                if sock is None:
+                    if on_unreachable:
+                        on_unreachable(proxy_data)
+                    continue
+                selector.register(sock, selectors.EVENT_WRITE, proxy_data)
+                deadlines[sock] = time.monotonic() + timeout
+            if not deadlines:
+                return
+
+            for key, _ in selector.select(max(min(deadlines.values()) - time.monotonic(), 0)):
+                sock, proxy_data = key.fileobj, key.data
+                connected = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0
+                finish(sock)
+                if connected:
+                    yield proxy_data
+                elif on_unreachable:
+                    on_unreachable(proxy_data)
+
+            now = time.monotonic()
+            for sock in [sock for sock, deadline in deadlines.items() if deadline <= now]:
+                proxy_data = selector.get_key(sock).data
+                finish(sock)
+                if on_unreachable:
+                    on_unreachable(proxy_data)
+    finally:
+        for sock in list(deadlines):
+            finish(sock)
+        selector.close()
+
+def validate_proxies_concurrently(proxy_list, verify_func, max_workers=32, min_valid=None, on_valid=None,
+                                  tcp_timeout=None, on_unreachable=None):
+    """
+    並行驗證代理伺服器
+
+    Args:
+        proxy_list (list): 待驗證的代理伺服器資料列表
+        verify_func (callable): verify_func(proxy_data) -> bool, 驗證單一 proxy
+        max_workers (int): 同時驗證的數量上限
+        min_valid (int, optional): 找到這麼多個有效 proxy 後就先返回; None 表示等全部驗證完, 0 表示立即返回 (全部在背景驗證)
+        on_valid (callable, optional): on_valid(proxy_data, latency) 每找到一個有效 proxy 就呼叫
+                                       (提前返回後, 背景驗證到的 proxy 也會透過它回報)
+        tcp_timeout (float, optional): 指定時先做 TCP 預先篩選 (iter_tcp_reachable), 連得上的 proxy 一出現就送去驗證
+        on_unreachable (callable, optional): on_unreachable(proxy_data), TCP 預先篩選時連不上的 proxy
+
+    Returns:
+        tuple: (目前已找到的有效 proxy 列表, 背景驗證用的 executor)
+               不再需要背景驗證時呼叫 executor.shutdown(wait=False, cancel_futures=True) 取消剩下的工作
+    """
+    valid_proxies = []
+    lock = threading.Lock()
+    enough = threading.Event()
+
+    def check(proxy_data):
+        start_time = time.monotonic()
+        if not verify_func(proxy_data):
+            return
+        latency = time.monotonic() - start_time
+        with lock:
+            valid_proxies.append(proxy_data)
+            if min_valid and len(valid_proxies) >= min_valid:
+                enough.set()
+        if on_valid:
+            on_valid(proxy_data, latency)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = []
+    feeding_done = threading.Event()
+
+    def feed(candidates):
+        try:
+            for proxy_data in candidates:
+                try:
+                    futures.append(executor.submit(check, proxy_data))
+                except RuntimeError: # 呼叫端已取消背景驗證
+                    break
+        finally:
+            if hasattr(candidates, 'close'):
+                candidates.close() # 關閉 TCP 預先篩選中尚未完成的連線
+            executor.shutdown(wait=False) # 不再提交新工作, 已提交的工作繼續執行
+            feeding_done.set()
+
+    if tcp_timeout:
+        candidates = iter_tcp_reachable(proxy_list, tcp_timeout, on_unreachable=on_unreachable)
+        threading.Thread(target=feed, args=(candidates,), daemon=True).start()
+    else:
+        feed(proxy_list)
+
+    if min_valid is not None and min_valid <= 0:
+        enough.set()
+    while not enough.is_set():
+        fed_all = feeding_done.is_set() # 先確認已提交全部工作, 再取得 futures, 才不會漏掉最後提交的工作
+        not_done = [future for future in list(futures) if not future.done()]
+        if fed_all and not not_done:
+            break
+        if not_done:
+            wait(not_done, timeout=0.2)
+        else:
+            feeding_done.wait(0.2)
+
+    with lock:
+        return list(valid_proxies), executor
@@ -1,70 +1,46 @@
+import argparse
 import requests
-from bs4 import BeautifulSoup
 import json
-import csv
+import os
 import time
 import random # 導入 random 模組
-
-# ----- 每抓一筆停 2 秒, 每六筆換一次換 proxy, 每換一次 proxy 停 1 秒,
+import sys
+from twse_rate_limiter import AdaptiveRateLimiter, is_throttle_response
+from proxy_pool import ProxyPool, supports_https, to_requests_proxies
+from proxy_validator import validate_proxies_concurrently
+from proxy_store import ProxyStore, DEFAULT_TTL_SECONDS
+import proxy_sources
+import twse_http
+import twse_json
+from twse_http_cache import ResponseCache
+from twse_fetch_engine import iter_fetch_results
+from twse_month_store import MonthStore, is_closed_month
+from twse_checkpoint import CheckpointJournal, journal_path_for
+from twse_sinks import CsvSink, ParquetSink, BatchedRowWriter
+from twse_archive import ArchiveSink
+import twse_parser
+import twse_market_daily
+from twse_security_master import load_security_master
+import twse_batch
+import twse_indicators
+import twse_gaps
+import twse_shards
+from twse_metrics import RequestMetrics, metrics_path_for, outcome_of
+
+# ----- 所有 (股號, 年月) 並行抓取, 由全域 AdaptiveRateLimiter 依 TWSE 回應自動調整每秒請求數,
+# ----- 每次請求由 ProxyPool 依各 proxy 的成功率與延遲加權挑選, 連續失敗的 proxy 暫時隔離
 # ----- Proxy 相關函式  -----
 def get_proxy_list(url):
     """
-    從網頁抓取代理伺服器列表
+    從網頁抓取代理伺服器列表 (表格解析見 proxy_sources)
     """
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    try: # 加入 try-except 處理 requests.exceptions.RequestException，更健壯
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()  # 檢查請求是否成功
-    except requests.exceptions.RequestException as e:
-        print(f"抓取網址 {url} 時發生錯誤: {e}") # 印出錯誤訊息，方便debug
-        return [] # 發生錯誤時返回空列表，避免程式中斷
-
-    soup = BeautifulSoup(response.content, 'html.parser')
-    table = soup.find('table', class_='table table-striped table-bordered')
-    proxy_list = []
-    if table:
-        tbody = table.find('tbody')
-        if tbody:
-            rows = tbody.find_all('tr')
-            for row in rows:
-                cells = row.find_all('td')
-                if cells and len(cells) >= 8: # 確保 cells 數量足夠，避免 IndexError
-                    ip_address = cells[0].text.strip()
-                    port = cells[1].text.strip()
-                    code = cells[2].text.strip()
-                    country = cells[3].text.strip()
-                    anonymity = cells[4].text.strip()
-                    google = cells[5].text.strip()
-
-                    # 針對 socks-proxy.net 網站，HTTPS 欄位可能不存在或結構不同，需額外處理
-                    if "socks-proxy" in url:
-                        https_type = "http" # socks-proxy.net 預設為 HTTP/SOCKS 代理
-                    else: # free-proxy-list 網站的 HTTPS 判斷邏輯
-                        https_type = "https" if cells[6].find('i', class_='fa fa-check text-success') else "http" # 判斷是否支援 HTTPS
-
-                    last_checked = cells[7].text.strip()
-
-                    proxy_list.append({
-                        'ip_address': ip_address,
-                        'port': port,
-                        'code': code,
-                        'country': country,
-                        'anonymity': anonymity,
-                        'google': google,
-                        'https': https_type,
-                        'last_checked': last_checked
-                    })
-    return proxy_list
+    return proxy_sources.fetch_source(url)
 
 def verify_proxy(proxy_data):
     """
     驗證代理伺服器是否有效
     """
-    proxies = {
-        proxy_data['https']: f"{proxy_data['ip_address']}:{proxy_data['port']}"
-    }
+    proxies = to_requests_proxies(proxy_data)
     try:
         response = requests.get("https://www.google.com", proxies=proxies, timeout=5) # 設定timeout避免無限等待
         if response.status_code == 200:
@@ -74,56 +50,187 @@ def verify_proxy(proxy_data):
     except requests.exceptions.RequestException as e:
         return False
 
-def get_valid_proxies():
+def get_valid_proxies(max_workers=32, min_valid=None, on_valid=None, proxy_store=None, ttl=DEFAULT_TTL_SECONDS, tcp_timeout=2.0):
     """
-    取得有效的代理伺服器列表
+    取得有效的代理伺服器列表 (並行驗證)
+
+    Args:
+        max_workers (int): 同時驗證的 proxy 數量上限
+        min_valid (int, optional): 找到這麼多個有效 proxy 就先返回, 其餘在背景繼續驗證. Defaults to None (全部驗證完才返回).
+        on_valid (callable, optional): on_valid(proxy_data, latency), 每驗證到一個有效 proxy (包含背景驗證) 就呼叫
+        proxy_store (ProxyStore, optional): proxy 資料庫; 指定時 ttl 秒內驗證過的 proxy 沿用上次結果,
+                                            其餘依歷史可用率排序後驗證, 每次驗證結果都寫入資料庫
+        ttl (float): 驗證結果的有效秒數
+        tcp_timeout (float): TCP 預先篩選的連線逾時秒數, 連得上的 proxy 才做 HTTPS 驗證 (0 表示不篩選)
+
+    Returns:
+        tuple: (有效代理伺服器列表, 背景驗證的 executor)
     """
     urls = [
-        "https://free-proxy-list.net/anonymous-proxy.html"
-        # "https://free-proxy-list.net/",
-        # "https://www.socks-proxy.net/"
+        proxy_sources.FREE_PROXY_LIST_ANONYMOUS
+        # proxy_sources.FREE_PROXY_LIST,
+        # proxy_sources.SOCKS_PROXY
     ]
-    all_proxies = []
-    for url in urls:
-        proxies = get_proxy_list(url)
-        if proxies:
-            all_proxies.extend(proxies)
-
-    unique_proxies = []
-    seen_proxies = set()
-    for proxy_data in all_proxies:
-        proxy_identifier = f"{proxy_data['ip_address']}:{proxy_data['port']}"
-        if proxy_identifier not in seen_proxies:
-            unique_proxies.append(proxy_data)
-            seen_proxies.add(proxy_identifier)
-
-    valid_proxies = []
-    for proxy_data in unique_proxies:
-        if verify_proxy(proxy_data):
-            valid_proxies.append(proxy_data)
+
+    def on_source(url, proxies):
+        if proxies and proxy_store:
+            proxy_store.record_seen(proxies, url)
+
+    unique_proxies = proxy_sources.fetch_proxies(urls, on_source=on_source) # 同時抓取所有來源, 已去除重複
+    https_proxies = [proxy_data for proxy_data in unique_proxies if supports_https(proxy_data)]
+    if len(https_proxies) < len(unique_proxies):
+        print(f"略過 {len(unique_proxies) - len(https_proxies)} 個不支援 HTTPS 的 proxy (TWSE 網址皆為 https)。")
+    unique_proxies = https_proxies
+
+    verify_func = verify_proxy
+    on_unreachable = None
+    fresh_proxies = []
+    if proxy_store:
+        unique_proxies, fresh_valid, fresh_invalid = proxy_store.split_by_ttl(unique_proxies, ttl)
+        print(f"{len(fresh_valid)} 個 proxy 在 {ttl:.0f} 秒內已驗證有效, 直接使用; "
+              f"略過 {fresh_invalid} 個近期驗證失敗的 proxy; 需重新驗證 {len(unique_proxies)} 個。")
+        for proxy_data, latency in fresh_valid:
+            fresh_proxies.append(proxy_data)
+            if on_valid:
+                on_valid(proxy_data, latency)
+        if min_valid:
+            min_valid = max(min_valid - len(fresh_proxies), 0)
+
+        def verify_func(proxy_data):
+            start_time = time.monotonic()
+            ok = verify_proxy(proxy_data)
+            proxy_store.record_check(proxy_data, ok, time.monotonic() - start_time)
+            return ok
+
+        def on_unreachable(proxy_data):
+            proxy_store.record_check(proxy_data, False, error="TCP 連線失敗")
+
+    valid_proxies, background = validate_proxies_concurrently(
+        unique_proxies, verify_func, max_workers=max_workers, min_valid=min_valid, on_valid=on_valid,
+        tcp_timeout=tcp_timeout, on_unreachable=on_unreachable
+    )
+    valid_proxies = fresh_proxies + valid_proxies
     if valid_proxies:
         print(f"已取得 {len(valid_proxies)} 個有效代理伺服器。")
+        if min_valid is not None and len(valid_proxies) >= min_valid:
+            print("其餘代理伺服器在背景繼續驗證, 驗證通過後自動加入 proxy 池。")
     else:
         print("沒有取得有效的代理伺服器，程式將不使用代理。")
-    return valid_proxies
+    return valid_proxies, background
 
 # ----- ETF 列表網址和相關設定 (原本程式碼) -----
 etf_url = "https://www.twse.com.tw/rwd/zh/ETF/domestic?response=json"
 stock_url = "https://www.twse.com.tw/zh/exchangeReport/BWIBBU_d?response=json"
 daily_trading_url = "https://www.twse.com.tw/rwd/zh/afterTrading/STOCK_DAY?"
+market_daily_url = "https://www.twse.com.tw/rwd/zh/afterTrading/MI_INDEX?"
 
 headers = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
 }
 
-def get_etf_data(proxy=None): # 函式加入 proxy 參數
+class TwseThrottledError(requests.exceptions.HTTPError):
     """
-    抓取 ETF 列表資料
+    TWSE 回傳限流/封鎖回應 (HTTP 403/429 或「很抱歉」頁面)
+    """
+
+def twse_get(url, proxy=None, rate_limiter=None, proxy_pool=None, metrics=None, label=None, attempt=0):
     """
+    送出 TWSE 請求: 先向速率限制器取得 token, 再依回應向限制器 (與 proxy 池) 回報成功或失敗
+
+    啟用回應快取 (twse_http.default_cache) 時, 有效期限內的回應直接由快取返回 (不取得 token, 不連線);
+    過期的項目以 ETag / Last-Modified 條件請求重新驗證。
+
+    Args:
+        url (str): 請求網址
+        proxy (dict, optional): 代理伺服器設定. Defaults to None.
+        rate_limiter (RateLimiter, optional): 共用的速率限制器. Defaults to None.
+        proxy_pool (ProxyPool, optional): 代理伺服器池, 未指定 proxy 時由池中挑選. Defaults to None.
+        metrics (RequestMetrics, optional): 請求紀錄收集器, 紀錄每次請求的時間、狀態碼與大小. Defaults to None.
+        label (str, optional): 紀錄用的工作單位名稱 (例如 "2330 202401"). Defaults to None.
+        attempt (int): 紀錄用的重試次數 (0 為第一次). Defaults to 0.
+
+    Returns:
+        requests.Response: 成功的回應
+
+    Raises:
+        TwseThrottledError: 遇到限流回應
+        requests.exceptions.RequestException: 其他網路或 HTTP 錯誤
+    """
+    response_cache = twse_http.default_cache
+    if response_cache:
+        cached_response = response_cache.get_fresh(url)
+        if cached_response is not None:
+            return cached_response
+    proxy_data = None
+    if proxy is None and proxy_pool is not None:
+        proxy_data = proxy_pool.acquire()
+        proxy = to_requests_proxies(proxy_data)
+    wait_start = time.monotonic()
+    if rate_limiter:
+        rate_limiter.acquire()
+    start_time = time.monotonic()
+
+    def record(outcome, response=None):
+        if metrics is None:
+            return
+        metrics.record(
+            label, url.split('?', 1)[0].rsplit('/', 1)[-1], next(iter(proxy.values())) if proxy else None, attempt, outcome,
+            status=response.status_code if response is not None else None,
+            wait=start_time - wait_start,
+            ttfb=response.elapsed.total_seconds() if response is not None else None,
+            total=time.monotonic() - start_time,
+            size=len(response.content) if response is not None else 0
+        )
+
+    try:
+        # 經由共用連線池 (每個 proxy 一個 keep-alive Session) 送出; 連線逾時縮短為 5 秒, 失效的 proxy 不會拖太久
+        request_headers = dict(headers, **response_cache.conditional_headers(url)) if response_cache else headers
+        response = twse_http.get_session(proxy).get(url, headers=request_headers, timeout=(5, 10))
+    except requests.exceptions.RequestException as e:
+        record(outcome_of(e))
+        if proxy_data:
+            proxy_pool.report_failure(proxy_data)
+        raise
+    latency = time.monotonic() - start_time
+    if response.status_code == 304 and response_cache: # 內容未變動, 沿用快取
+        cached_response = response_cache.revalidated(url)
+        if cached_response is not None:
+            record('not_modified', response)
+            if rate_limiter:
+                rate_limiter.report_success()
+            if proxy_data:
+                proxy_pool.report_success(proxy_data, latency)
+            return cached_response
+    content_type = response.headers.get('Content-Type', '')
+    text = response.text if 'json' not in content_type.lower() else '' # JSON 回應不需檢查限流頁面內容
+    if is_throttle_response(response.status_code, content_type, text):
+        if rate_limiter:
+            rate_limiter.report_throttled()
+        if proxy_data: # 被限流的 proxy IP 也暫時少用
+            proxy_pool.report_failure(proxy_data)
+        record('throttled', response)
+        raise TwseThrottledError(f"TWSE 限流回應 (HTTP {response.status_code})", response=response)
     try:
-        response = requests.get(etf_url, headers=headers, proxies=proxy, timeout=10) # requests.get 加入 proxies 參數和 timeout
         response.raise_for_status()
-        json_data = response.json()
+    except requests.exceptions.HTTPError:
+        record('http_error', response)
+        raise
+    record('ok', response)
+    if response_cache:
+        response_cache.store(url, response)
+    if rate_limiter:
+        rate_limiter.report_success()
+    if proxy_data:
+        proxy_pool.report_success(proxy_data, latency)
+    return response
+
+def get_etf_data(proxy=None, rate_limiter=None): # 函式加入 proxy 參數
+    """
+    抓取 ETF 列表資料
+    """
+    try:
+        response = twse_get(etf_url, proxy=proxy, rate_limiter=rate_limiter)
+        json_data = twse_json.decode_response(response)
         if json_data['status'] == 'ok':
             return json_data['data']
         else:
@@ -139,14 +246,13 @@ def get_etf_data(proxy=None): # 函式加入 proxy 參數
         print(f"ETF 發生錯誤: {e}")
         return None
 
-def get_stock_data(proxy=None): # 函式加入 proxy 參數
+def get_stock_data(proxy=None, rate_limiter=None): # 函式加入 proxy 參數
     """
     抓取個股本益比、殖利率及股價淨值比資料
     """
     try:
-        response = requests.get(stock_url, headers=headers, proxies=proxy, timeout=10) # requests.get 加入 proxies 參數和 timeout
-        response.raise_for_status()
-        json_data = response.json()
+        response = twse_get(stock_url, proxy=proxy, rate_limiter=rate_limiter)
+        json_data = twse_json.decode_response(response)
         if json_data['stat'] == 'OK':
             return json_data['data']
         else:
@@ -162,7 +268,7 @@ def get_stock_data(proxy=None): # 函式加入 proxy 參數
         print(f"個股發生錯誤: {e}")
         return None
 
-def get_daily_trading_data(stock_code, year_month, max_retries=3, retry_delay=5, proxy=None): # 函式加入 proxy 參數
+def get_daily_trading_data(stock_code, year_month, max_retries=3, retry_delay=5, proxy=None, rate_limiter=None, proxy_pool=None, metrics=None): # 函式加入 proxy 參數
     """
     抓取個股或 ETF 的每日成交資料 (加入重試機制)
 
@@ -172,6 +278,9 @@ def get_daily_trading_data(stock_code, year_month, max_retries=3, retry_delay=5,
         max_retries (int): 最大重試次數
         retry_delay (int): 重試間隔秒數
         proxy (dict, optional): 代理伺服器設定. Defaults to None.  <--- 加入 proxy 說明
+        rate_limiter (RateLimiter, optional): 全域速率限制器, 每次送出請求 (含重試) 前取得 token, 並依回應調整速率. Defaults to None.
+        proxy_pool (ProxyPool, optional): 代理伺服器池, 每次請求 (含重試) 重新挑選 proxy. Defaults to None.
+        metrics (RequestMetrics, optional): 請求紀錄收集器. Defaults to None.
 
     Returns:
         list: 每日成交資料列表，若發生錯誤超過重試次數則返回 None
@@ -184,11 +293,9 @@ def get_daily_trading_data(stock_code, year_month, max_retries=3, retry_delay=5,
                 'response': 'json'
             }
             url_with_params = f"{daily_trading_url}date={params['date']}&stockNo={params['stockNo']}&response={params['response']}"
-
-
-            response = requests.get(url_with_params, headers=headers, proxies=proxy, timeout=10) # requests.get 加入 proxies 參數和 timeout
-            response.raise_for_status()
-            json_data = response.json()
+            response = twse_get(url_with_params, proxy=proxy, rate_limiter=rate_limiter, proxy_pool=proxy_pool,
+                                metrics=metrics, label=f"{stock_code} {year_month}", attempt=retry_attempt)
+            json_data = twse_json.decode_response(response)
 
 
             if json_data['stat'] == 'OK':
@@ -204,6 +311,10 @@ def get_daily_trading_data(stock_code, year_month, max_retries=3, retry_delay=5,
         except requests.exceptions.RequestException as e:
             print(f"每日成交資訊網頁請求錯誤: 股號 {stock_code}, 年月 {year_month}, 錯誤訊息: {e}")
             if retry_attempt < max_retries - 1:
+                if isinstance(e, TwseThrottledError) and rate_limiter:
+                    continue # 限流時由 rate_limiter 降速等待, 不再額外固定等待
+                if proxy_pool and isinstance(e, (requests.exceptions.ProxyError, requests.exceptions.Timeout)):
+                    continue # proxy 失效時下次重試會換另一個 proxy, 不需等待
                 wait_time = retry_delay * (retry_attempt + 1)
                 time.sleep(wait_time)
             else:
@@ -217,18 +328,59 @@ def get_daily_trading_data(stock_code, year_month, max_retries=3, retry_delay=5,
     return None
 
 
-def save_to_csv(data, filename, headers_csv):
+def get_market_daily_data(date_str, max_retries=3, retry_delay=5, proxy=None, rate_limiter=None, proxy_pool=None, metrics=None):
     """
-    將資料儲存為 CSV 檔案
+    抓取某一天全市場的每日收盤行情 (MI_INDEX, 依日期抓取模式使用)
+
+    Args:
+        date_str (str): 日期，格式為YYYYMMDD (例如: 20240102)
+        max_retries (int): 最大重試次數
+        retry_delay (int): 重試間隔秒數
+        proxy (dict, optional): 代理伺服器設定. Defaults to None.
+        rate_limiter (RateLimiter, optional): 全域速率限制器. Defaults to None.
+        proxy_pool (ProxyPool, optional): 代理伺服器池. Defaults to None.
+        metrics (RequestMetrics, optional): 請求紀錄收集器. Defaults to None.
+
+    Returns:
+        tuple: (fields, data) 個股行情表格; 非交易日返回 ([], []); 若發生錯誤超過重試次數則返回 None
     """
-    try:
-        with open(filename, 'w', newline='', encoding='utf-8-sig') as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(headers_csv)
-            writer.writerows(data)
-        print(f"資料已儲存至 {filename}")
-    except Exception as e:
-        print(f"儲存 CSV 檔案時發生錯誤: {e}")
+    for retry_attempt in range(max_retries):
+        try:
+            url_with_params = f"{market_daily_url}date={date_str}&type=ALLBUT0999&response=json"
+            response = twse_get(url_with_params, proxy=proxy, rate_limiter=rate_limiter, proxy_pool=proxy_pool,
+                                metrics=metrics, label=f"MI_INDEX {date_str}", attempt=retry_attempt)
+            json_data = twse_json.decode_response(response)
+
+            if json_data['stat'] == 'OK':
+                fields, data = twse_market_daily.find_stock_table(json_data)
+                if fields is None:
+                    print(f"全市場行情 {date_str} 找不到個股行情表格")
+                    return None
+                return fields, data
+            elif '沒有符合條件的資料' in json_data['stat']: # 非交易日 (假日)
+                return [], []
+            else:
+                print(f"全市場行情 API 請求返回 status 錯誤: {json_data['stat']}")
+                return None
+
+        except requests.exceptions.RequestException as e:
+            print(f"全市場行情網頁請求錯誤: 日期 {date_str}, 錯誤訊息: {e}")
+            if retry_attempt < max_retries - 1:
+                if isinstance(e, TwseThrottledError) and rate_limiter:
+                    continue # 限流時由 rate_limiter 降速等待, 不再額外固定等待
+                if proxy_pool and isinstance(e, (requests.exceptions.ProxyError, requests.exceptions.Timeout)):
+                    continue # proxy 失效時下次重試會換另一個 proxy, 不需等待
+                wait_time = retry_delay * (retry_attempt + 1)
+                time.sleep(wait_time)
+            else:
+                return None
+        except json.JSONDecodeError as e:
+            print(f"全市場行情 JSON 解析錯誤: 日期 {date_str}, 錯誤訊息: {e}")
+            return None
+        except Exception as e:
+            print(f"全市場行情發生錯誤: 日期 {date_str}, 錯誤訊息: {e}")
+            return None
+    return None
 
 def get_date_range():
     """
@@ -238,145 +390,480 @@ def get_date_range():
         start_date_str = input("請輸入起始年月 (YYYY/MM, 例如: 2024/01): ")
         end_date_str = input("請輸入結束年月 (YYYY/MM, 例如: 2024/12): ")
         try:
-            start_year_month = time.strptime(start_date_str, "%Y/%m")
-            end_year_month = time.strptime(end_date_str, "%Y/%m")
-            if start_year_month > end_year_month:
+            return twse_batch.month_range(start_date_str, end_date_str)
+        except ValueError as e:
+            if "晚於" in str(e):
                 print("起始年月不能晚於結束年月，請重新輸入。")
-                continue
+            else:
+                print("日期格式錯誤，請使用YYYY/MM 格式輸入 (例如: 2024/01)。")
 
-            year_month_list = []
-            current_year_month = start_year_month
-            while current_year_month <= end_year_month:
-                year_month_list.append(time.strftime("%Y%m", current_year_month))
-                if current_year_month.tm_mon == 12:
-                    current_year_month = time.strptime(str(current_year_month.tm_year + 1) + "/01", "%Y/%m")
-                else:
-                    current_year_month = time.strptime(str(current_year_month.tm_year) + "/" + str(current_year_month.tm_mon + 1).zfill(2), "%Y/%m")
+def parse_args():
+    """
+    解析命令列參數 (指定 --config 時, 設定檔中的值作為預設值, 命令列參數優先)
+    """
+    parser = argparse.ArgumentParser(description="抓取 TWSE 個股/ETF 每日成交資料")
+    parser.add_argument('--config', help="批次設定檔 (JSON, 鍵名同命令列參數, 例如 {\"stocks\": \"etf\", \"start\": \"2024/01\"})")
+    parser.add_argument('--stocks', help="非互動模式: 要抓取的股號, 可為 all / etf / stocks、以逗號分隔的股號, 或 @清單檔")
+    parser.add_argument('--start', help="非互動模式: 起始年月 (YYYY/MM)")
+    parser.add_argument('--end', help="非互動模式: 結束年月 (YYYY/MM, 預設為本月)")
+    parser.add_argument('--output', help="輸出 CSV 檔名 (預設依股號與年月範圍命名)")
+    parser.add_argument('--workers', type=int, default=8, help="同時進行中的請求數 (預設 8)")
+    parser.add_argument('--rps', type=float, default=0.5, help="初始每秒請求數, 之後依 TWSE 回應自動調整 (預設 0.5)")
+    parser.add_argument('--no-proxy', action='store_true', help="不抓取與使用 proxy, 直接連線")
+    parser.add_argument('--resume', action='store_true', help="從上次中斷的進度繼續, 略過已完成的 (股號, 年月)")
+    parser.add_argument('--parquet', action='store_true', help="另外輸出 Parquet 檔 (需安裝 pyarrow)")
+    parser.add_argument('--by-date', action='store_true', help="依日期抓取: 每個交易日一次請求全市場行情 (MI_INDEX), 再轉成逐股資料")
+    parser.add_argument('--typed', action='store_true', help="輸出具型別資料 (ISO 日期、整數成交量、浮點價格), 需安裝 pandas")
+    parser.add_argument('--indicators', action='store_true', help="抓取後計算技術指標 (日報酬率、MA、RSI、成交量 Z 分數), 輸出 *_indicators.csv, 需安裝 pandas")
+    parser.add_argument('--refresh-master', action='store_true', help="忽略證券主檔快取, 重新抓取 ETF 與個股列表")
+    parser.add_argument('--proxy-workers', type=int, default=32, help="同時驗證的 proxy 數量上限 (預設 32)")
+    parser.add_argument('--min-proxies', type=int, default=5, help="找到幾個有效 proxy 就開始抓取, 其餘在背景繼續驗證 (預設 5)")
+    parser.add_argument('--proxy-ttl', type=float, default=DEFAULT_TTL_SECONDS,
+                        help=f"proxy 驗證結果的有效秒數, 期間內驗證過的 proxy 不再重新驗證 (proxy_store.sqlite3, 預設 {DEFAULT_TTL_SECONDS})")
+    parser.add_argument('--proxy-tcp-timeout', type=float, default=2.0,
+                        help="proxy 驗證前先以 TCP 連線篩選的逾時秒數, 連不上的不再做 HTTPS 驗證 (0 表示不篩選, 預設 2)")
+    parser.add_argument('--batch-size', type=int, default=5000, help="每累積多少筆資料寫出一次 (預設 5000)")
+    parser.add_argument('--metrics-json', help="請求統計 JSON 輸出檔 (預設為 <輸出檔名>_metrics.json)")
+    parser.add_argument('--gaps', action='store_true', help="非互動模式: 分析輸出檔的資料缺口並輸出補抓清單 (*_gaps.csv), 不抓取")
+    parser.add_argument('--backfill', action='store_true', help="非互動模式: 分析資料缺口後只補抓有缺口的 (股號, 年月)")
+    parser.add_argument('--shards', type=int, default=1, help="非互動模式: 分成幾個工作行程同時抓取 (各自使用一部分 proxy 與每秒請求數), 最後合併輸出 (預設 1)")
+    parser.add_argument('--proxy-file', help="從 JSON 檔讀取 proxy 列表 (get_proxy_list 格式), 不再抓取與驗證 proxy")
+    parser.add_argument('--no-cache', action='store_true', help="不使用 TWSE 回應快取 (twse_http_cache.sqlite3)")
+    parser.add_argument('--archive', nargs='?', const="twse_archive.sqlite3",
+                        help="同時寫入本地股價資料庫 (SQLite, 以股號與日期查詢, 見 twse_archive.py), 可指定檔名 (預設 twse_archive.sqlite3)")
+    parser.add_argument('--reference', default=twse_gaps.DEFAULT_REFERENCE_CODE, help="缺口分析的交易日參考股票 (預設 0050)")
+    args = parser.parse_args()
+    if args.config:
+        parser.set_defaults(**twse_batch.load_config(args.config))
+        args = parser.parse_args()
+    return args
+
+def open_sinks(args, filename, csv_headers, append):
+    """
+    依命令列參數建立輸出目標: CSV, 以及選用的 Parquet (--parquet) 與本地股價資料庫 (--archive)
 
-            return year_month_list
-        except ValueError:
-            print("日期格式錯誤，請使用YYYY/MM 格式輸入 (例如: 2024/01)。")
+    Returns:
+        list: 輸出目標列表
+    """
+    sinks = [CsvSink(filename, csv_headers, append=append)]
+    if args.parquet:
+        try:
+            sinks.append(ParquetSink(os.path.splitext(filename)[0] + ".parquet", csv_headers, append=append, typed=args.typed))
+        except RuntimeError as e:
+            print(f"無法輸出 Parquet: {e}")
+    if args.archive:
+        sinks.append(ArchiveSink(args.archive))
+    return sinks
+
+def run_sharded(args, stock_codes_to_fetch, year_month_list, filename, csv_headers, proxy_list):
+    """
+    多行程分片抓取: 股票與 proxy 輪流分給各工作行程, 每個行程使用 --rps / 分片數 的速率,
+    各自寫入分片 CSV, 全部結束後合併到輸出檔 (略過輸出檔中已有的資料), 再刪除分片檔
+
+    Args:
+        args (argparse.Namespace): 命令列參數
+        stock_codes_to_fetch (list): 要抓取的股票資訊列表
+        year_month_list (list): 年月列表，格式為YYYYMM
+        filename (str): 輸出 CSV 檔名
+        csv_headers (list): CSV 欄位標題
+        proxy_list (list): 有效的 proxy 資料列表
+    """
+    shards = twse_shards.partition(stock_codes_to_fetch, args.shards)
+    proxy_shards = twse_shards.partition(proxy_list, len(shards)) if proxy_list else []
+    shard_rps = args.rps / len(shards)
+    shard_workers = max(1, args.workers // len(shards))
+    argv_list = []
+    part_filenames = []
+    shard_input_files = []
+    for shard_index, shard in enumerate(shards):
+        shard_proxies = proxy_shards[shard_index % len(proxy_shards)] if proxy_shards else [] # proxy 比分片少時輪流共用
+        codes_path, proxies_path = twse_shards.write_shard_inputs(filename, shard_index, [stock_info['股號'] for stock_info in shard], shard_proxies)
+        part_filename = twse_shards.shard_path(filename, shard_index)
+        argv = [
+            sys.argv[0],
+            '--stocks', '@' + codes_path,
+            '--start', f"{year_month_list[0][:4]}/{year_month_list[0][4:]}",
+            '--end', f"{year_month_list[-1][:4]}/{year_month_list[-1][4:]}",
+            '--output', part_filename,
+            '--rps', str(shard_rps),
+            '--workers', str(shard_workers),
+            '--batch-size', str(args.batch_size),
+        ]
+        argv += ['--proxy-file', proxies_path] if proxies_path else ['--no-proxy']
+        if args.no_cache:
+            argv.append('--no-cache')
+        argv_list.append(argv)
+        part_filenames.append(part_filename)
+        shard_input_files += [path for path in (codes_path, proxies_path) if path]
+
+    print(f"分片抓取: {len(shards)} 個工作行程, 每個行程同時 {shard_workers} 個請求, 每秒 {shard_rps:.3g} 次")
+    metrics = RequestMetrics() # 合併各分片的請求紀錄, 耗時從啟動工作行程開始計算
+    try:
+        exit_codes = twse_shards.run_workers(main, argv_list)
+    except KeyboardInterrupt:
+        print("\n已中斷, 各分片的進度已儲存, 重新執行相同的命令即可接續抓取並合併。")
+        return
+    if any(exit_codes):
+        print(f"部分工作行程異常結束 (結束代碼 {exit_codes}), 分片檔已保留, 重新執行相同的命令即可接續。")
+        return
+
+    # 合併分片: 依輸出格式 (CSV / Parquet / 具型別) 寫入, 略過輸出檔中已經有的 (股號, 日期)
+    existing_units = twse_batch.scan_existing_output(filename, year_month_list)
+    sinks = open_sinks(args, filename, csv_headers, append=True)
+    transform = None
+    if args.typed:
+        transform = lambda rows: twse_parser.parse_daily_rows(rows, csv_headers)
+    row_writer = BatchedRowWriter(sinks, batch_size=args.batch_size, transform=transform)
+    for rows in twse_shards.iter_part_rows(part_filenames, existing_units, args.batch_size):
+        row_writer.write_rows(rows)
+    row_writer.close()
+    print(f"已合併 {len(part_filenames)} 個分片, 新增 {row_writer.rows_written} 筆資料")
+
+    # 各分片的請求統計合併成一份 (<輸出檔名>_metrics.json)
+    shard_metrics_files = [metrics_path_for(part_filename) for part_filename in part_filenames]
+    for path in shard_metrics_files:
+        if os.path.exists(path):
+            metrics.merge_json(path)
+    summary = metrics.summarize()
+    if summary['requests']:
+        metrics.print_summary(summary)
+        metrics_filename = args.metrics_json or metrics_path_for(filename)
+        try:
+            metrics.write_json(metrics_filename, summary)
+            print(f"請求統計已儲存至 {metrics_filename}")
+        except OSError as e:
+            print(f"寫入請求統計 {metrics_filename} 時發生錯誤: {e}")
+
+    failed_shards = [part_filename for part_filename in part_filenames if os.path.exists(journal_path_for(part_filename))]
+    for path in part_filenames + shard_input_files + shard_metrics_files + [journal_path_for(part_filename) for part_filename in part_filenames]:
+        if os.path.exists(path):
+            os.remove(path)
+    for sink in sinks:
+        print(f"資料已儲存至 {sink.filename}")
+    if failed_shards:
+        print(f"{len(failed_shards)} 個分片有抓取失敗的資料, 可加上 --backfill 重新執行以只補抓缺少的部分。")
+    if args.indicators:
+        try:
+            indicators_filename = twse_indicators.write_indicators(filename)
+            print(f"技術指標已儲存至 {indicators_filename}")
+        except Exception as e:
+            print(f"計算技術指標時發生錯誤: {e}")
 
 def main():
-    print("開始抓取並驗證 Proxy 伺服器...")  # <-- 加入進程訊息
-    valid_proxies = get_valid_proxies()  # 取得有效 proxy 列表
-    if valid_proxies:
-        print(f" {len(valid_proxies)} 個有效代理伺服器驗證完成。")  # <-- 更精確的進程訊息
-    else:
-        print("未抓取到任何 proxy，將不使用代理。")  # 或者其他處理方式
-    proxy_index = 0 # proxy 索引
-    request_count = 0 # 請求計數器
-    proxy_rotation_frequency = 6 # 每 24 次請求換一次 proxy
-
-    print("================== ETF列表 ==================")
-    etf_list = get_etf_data()
-    individual_stock_list = get_stock_data()
-
-    all_stock_info = []
-
-    if etf_list:
-        for etf_info in etf_list:
-            stock_code = etf_info[0]
-            stock_name = etf_info[1]
-            all_stock_info.append({'股號': stock_code, '股票名稱': stock_name, '股票類別': 'ETF'})
-            print(f"股號: {stock_code}, 股票名稱: {stock_name}, 股票類別: ETF")
-    else:
-        print("無法取得 ETF 列表資訊")
-
-    print("\n================== 個股列表 ==================")
-    if individual_stock_list:
-        for stock_info in individual_stock_list:
-            stock_code = stock_info[0]
-            stock_name = stock_info[1]
-            all_stock_info.append({'股號': stock_code, '股票名稱': stock_name, '股票類別': '個股'})
-            print(f"股號: {stock_code}, 股票名稱: {stock_name}, 股票類別: 個股")
+    args = parse_args()
+    if (args.typed or args.indicators) and not twse_parser.is_available():
+        print("具型別輸出 (--typed) 與技術指標 (--indicators) 需要安裝 numpy 與 pandas，程式結束。")
+        return
+
+    batch_mode = bool(args.stocks) # 指定 --stocks 時為非互動批次模式 (可由 cron 執行)
+    if (args.gaps or args.backfill) and not batch_mode:
+        print("缺口分析 (--gaps/--backfill) 需要以 --stocks、--start、--end 指定範圍，程式結束。")
+        return
+    if args.rps <= 0:
+        print("--rps 必須大於 0，程式結束。")
+        return
+    if args.shards > 1 and (not batch_mode or args.by_date or args.gaps or args.backfill):
+        print("分片抓取 (--shards) 只能用於逐股的非互動模式 (--stocks), 不能與 --by-date/--gaps/--backfill 同時使用，程式結束。")
+        return
+    if batch_mode:
+        try:
+            year_month_list = twse_batch.month_range(args.start or "", args.end or time.strftime("%Y/%m"))
+        except ValueError as e:
+            print(f"批次模式需要正確的 --start/--end (YYYY/MM): {e}")
+            return
+
+    proxy_pool = ProxyPool() # 依健康分數挑選 proxy, 取代原本每 6 筆輪流換一次
+    proxy_validation = None
+    if args.proxy_file:
+        with open(args.proxy_file, 'r', encoding='utf-8') as f:
+            file_proxies = json.load(f)
+        skipped = 0
+        for proxy_data in file_proxies:
+            if supports_https(proxy_data):
+                proxy_pool.add(proxy_data)
+            else:
+                skipped += 1
+        print(f"使用 proxy 列表檔 {args.proxy_file} ({len(proxy_pool)} 個)")
+        if skipped:
+            print(f"略過 {skipped} 個不支援 HTTPS 的 proxy (TWSE 網址皆為 https)。")
+    elif args.no_proxy:
+        print("不使用代理伺服器。")
     else:
-        print("無法取得個股資訊")
+        print("開始抓取並驗證 Proxy 伺服器...")  # <-- 加入進程訊息
+        valid_proxies, proxy_validation = get_valid_proxies(  # 取得有效 proxy 列表, 背景驗證通過的 proxy 也會加入 proxy_pool
+            max_workers=args.proxy_workers, min_valid=args.min_proxies, on_valid=proxy_pool.add,
+            proxy_store=ProxyStore(), ttl=args.proxy_ttl, tcp_timeout=args.proxy_tcp_timeout
+        )
+        if valid_proxies:
+            print(f" {len(valid_proxies)} 個有效代理伺服器驗證完成。")  # <-- 更精確的進程訊息
+        else:
+            print("未抓取到任何 proxy，將不使用代理。")  # 或者其他處理方式
+
+    def stop_proxy_validation():
+        if proxy_validation:
+            proxy_validation.shutdown(wait=False, cancel_futures=True) # 取消尚未開始的背景驗證
+
+    max_workers = args.workers # 同時進行中的請求數
+    twse_http.default_pool.configure(pool_maxsize=max_workers) # 每個 Session 的連線數與同時請求數相同, 不會丟棄 keep-alive 連線
+    requests_per_second = args.rps # 初始全域每秒請求數, 之後依 TWSE 回應自動調整
+    # 上下限包含使用者指定的 --rps (例如分片或 --rps 20), 自動調整不會把明確指定的速率壓低
+    rate_limiter = AdaptiveRateLimiter(requests_per_second, min_rate=min(0.05, requests_per_second), max_rate=max(5.0, requests_per_second))
+    month_store = MonthStore() # 本地月資料儲存, 已結束的月份不再重新下載
+    metrics = RequestMetrics() # 每個請求的時間、proxy、狀態碼、重試次數與大小
+    if not args.no_cache: # 回應快取: 證券主檔與已結束月份的資料重複執行時不需連線
+        twse_http.set_response_cache(ResponseCache())
+        if args.refresh_master:
+            twse_http.default_cache.invalidate(etf_url)
+            twse_http.default_cache.invalidate(stock_url)
+
+    print("================== 證券主檔 ==================")
+    all_stock_info, stock_index = load_security_master( # 一天內重複執行直接使用快取, 不再逐筆列印
+        lambda: get_etf_data(rate_limiter=rate_limiter),
+        lambda: get_stock_data(rate_limiter=rate_limiter),
+        refresh=args.refresh_master
+    )
 
     if not all_stock_info:
         print("沒有可抓取的股票資訊，程式結束。")
+        stop_proxy_validation()
         return
 
-
-    while True:
-        choice = input("\n請選擇抓取方式 (1: 抓取全部股票, 2: 抓取單一股號): ")
-        if choice == '1':
-            stock_codes_to_fetch = all_stock_info
-            break
-        elif choice == '2':
-            stock_code_input = input("請輸入要抓取的股號 (例如: 2330): ")
-            found_stock = False
-            for stock_info in all_stock_info:
-                if stock_info['股號'] == stock_code_input:
+    if batch_mode:
+        stock_codes_to_fetch, missing_codes = twse_batch.select_stocks(args.stocks, all_stock_info, stock_index)
+        if missing_codes:
+            print(f"查無以下股號, 將略過: {', '.join(missing_codes)}")
+        if not stock_codes_to_fetch:
+            print("沒有可抓取的股票，程式結束。")
+            stop_proxy_validation()
+            return
+        choice = '2' if len(stock_codes_to_fetch) == 1 else '1'
+        stock_code_input = stock_codes_to_fetch[0]['股號']
+        print(f"批次模式: {len(stock_codes_to_fetch)} 檔股票, {year_month_list[0]} ~ {year_month_list[-1]}")
+    else:
+        while True:
+            choice = input("\n請選擇抓取方式 (1: 抓取全部股票, 2: 抓取單一股號): ")
+            if choice == '1':
+                stock_codes_to_fetch = all_stock_info
+                break
+            elif choice == '2':
+                stock_code_input = input("請輸入要抓取的股號 (例如: 2330): ")
+                stock_info = stock_index.get(stock_code_input.strip())
+                if stock_info:
                     stock_codes_to_fetch = [stock_info]
-                    found_stock = True
                     break
-            if found_stock:
-                break
+                else:
+                    print("查無此股號，請重新輸入。")
             else:
-                print("查無此股號，請重新輸入。")
-        else:
-            print("輸入錯誤，請輸入 1 或 2。")
+                print("輸入錯誤，請輸入 1 或 2。")
 
-    year_month_list = get_date_range()
+        year_month_list = get_date_range()
 
     csv_headers = ["日期", "股號", "股票名稱", "股票類別", "成交股數", "成交金額", "開盤價", "最高價", "最低價", "收盤價", "漲跌價差", "成交筆數"]
-    all_daily_data = []
-
-    print("\n開始抓取每日成交資料...")
-    for stock_info in stock_codes_to_fetch:
-        stock_code = stock_info['股號']
-        stock_name = stock_info['股票名稱']
-        stock_category = stock_info['股票類別']
-        for year_month in year_month_list:
-            # ----- Proxy 更換邏輯 -----
-            current_proxy = None # 預設為不使用 proxy
-            if valid_proxies: # 如果有有效 proxy 列表才啟用
-                if request_count % proxy_rotation_frequency == 0: # 檢查是否需要更換 proxy
-                    current_proxy_data = valid_proxies[proxy_index % len(valid_proxies)] # 輪流使用 proxy
-                    current_proxy = {current_proxy_data['https']: f"{current_proxy_data['ip_address']}:{current_proxy_data['port']}"} # 設定 requests 可用的 proxy 格式
-                    print(f"更換 Proxy: {current_proxy_data['ip_address']}:{current_proxy_data['port']},  目前請求次數: {request_count}") # 印出更換訊息
-                    # print("更換 proxy 暫停 1 秒")
-                    time.sleep(1)  # <--- 加入 time.sleep(1) 暫停 1 秒
-                    proxy_index += 1 # 索引 + 1，下次使用下一個 proxy
-                else:
-                    current_proxy_data = valid_proxies[proxy_index % len(valid_proxies)] # 繼續使用目前的 proxy (但 index 不變)
-                    current_proxy = {current_proxy_data['https']: f"{current_proxy_data['ip_address']}:{current_proxy_data['port']}"} # 設定 requests 可用的 proxy 格式
-
-
-            daily_data = get_daily_trading_data(stock_code, year_month, proxy=current_proxy) # 傳入 proxy 參數
-            request_count += 1 # 每次請求後計數器 + 1  <--- 放在迴圈內
-            if daily_data:
-
-                for day_data in daily_data:
-                    csv_row = [
-                        day_data[0],
-                        stock_code,
-                        stock_name,
-                        stock_category,
-                        day_data[1],
-                        day_data[2],
-                        day_data[3],
-                        day_data[4],
-                        day_data[5],
-                        day_data[6],
-                        day_data[7],
-                        day_data[8]
-                    ]
-                    all_daily_data.append(csv_row)
-                print(f"股號 {stock_code} {stock_name} {year_month} 資料抓取完成")
-                time.sleep(2)
-            else:
+
+    if args.output:
+        filename = args.output
+    elif choice == '1':
+        filename = f"stock_daily_trading_data_{year_month_list[0]}_{year_month_list[-1]}.csv"
+    else:
+        filename = f"{stock_code_input}_daily_trading_data_{year_month_list[0]}_{year_month_list[-1]}.csv"
+
+    if args.shards > 1:
+        proxy_list = proxy_pool.snapshot()
+        stop_proxy_validation()
+        month_store.close()
+        twse_http.default_pool.close() # 不把已建立的連線帶進工作行程
+        if twse_http.default_cache:
+            twse_http.default_cache.close()
+            twse_http.set_response_cache(None)
+        run_sharded(args, stock_codes_to_fetch, year_month_list, filename, csv_headers, proxy_list)
+        return
+
+    # 批次模式為增量抓取: 接續寫入既有輸出檔, 並略過其中已經有資料的 (股號, 年月)
+    incremental = args.resume or batch_mode
+    # 只讀取本次年月範圍內的既有資料, 不把整個歷史輸出檔的日期都載入記憶體
+    existing_units = twse_batch.scan_existing_output(filename, year_month_list) if batch_mode else {}
+    codes_by_date = {} # 依日期模式: ISO 日期 -> 輸出檔中已有該日資料的股號
+    if args.by_date:
+        for (stock_code, _), dates in existing_units.items():
+            for iso_date in dates:
+                codes_by_date.setdefault(iso_date, set()).add(stock_code)
+    if existing_units:
+        print(f"既有輸出檔 {filename} 已有 {len(existing_units)} 個 (股號, 年月) 的資料")
+
+    def load_month(stock_code, year_month):
+        stored_data = month_store.get_closed(stock_code, year_month) # 已結束的月份直接使用本地資料
+        if stored_data is not None:
+            return stored_data
+        daily_data = get_daily_trading_data(stock_code, year_month, rate_limiter=rate_limiter, proxy_pool=proxy_pool, metrics=metrics)
+        if daily_data is not None: # 只儲存成功的結果 (包含查無交易資料的空列表)
+            month_store.put(stock_code, year_month, daily_data)
+        return daily_data
+
+    # 缺口分析: 以參考股票的交易日為行事曆, 找出輸出檔中缺少交易日的 (股號, 年月), 補抓時只抓這些工作單位
+    backfill_units = None
+    if args.gaps or args.backfill:
+        calendar = twse_gaps.build_exchange_calendar(year_month_list, existing_units, load_month, args.reference, max_workers)
+        gaps = twse_gaps.find_gaps([stock_info['股號'] for stock_info in stock_codes_to_fetch], year_month_list,
+                                   calendar, existing_units, month_store.get_closed)
+        gaps_filename = twse_gaps.write_gap_list(twse_gaps.gaps_path_for(filename), gaps)
+        print(f"資料缺口: {len(gaps)} 個 (股號, 年月), 共缺少 {sum(gap[2] for gap in gaps)} 個交易日, 補抓清單已儲存至 {gaps_filename}")
+        if not args.backfill or not gaps:
+            month_store.close()
+            stop_proxy_validation()
+            return
+        backfill_units = {(stock_code, year_month) for stock_code, year_month, _ in gaps}
+
+    # 進度紀錄: 每個 (股號, 年月) 的資料寫入輸出檔後才紀錄, 中斷後以 --resume 重新執行即可接續
+    # 只在明確指定 --resume 時讀取 (批次模式已由既有輸出檔略過完成的部分), 避免殘留的進度紀錄讓之後每次排程都略過當月
+    journal = CheckpointJournal(journal_path_for(filename), resume=args.resume)
+    if args.resume and journal.completed:
+        print(f"從進度紀錄 {journal.path} 接續, 已完成 {len(journal.completed)} 筆")
+
+    def is_final_unit(stock_code, period):
+        # 只有期間已結束的工作單位才紀錄或略過: 當月 (依日期模式為今天) 的資料之後還會增加, 每次都重新抓取
+        if stock_code == twse_market_daily.JOURNAL_KEY:
+            return period < time.strftime("%Y%m%d")
+        return is_closed_month(period)
+
+    def is_journal_done(stock_code, period):
+        return (journal.is_done(stock_code, period) and is_final_unit(stock_code, period)
+                and (stock_code == twse_market_daily.JOURNAL_KEY or not month_store.is_partial(stock_code, period)))
+
+    # 串流輸出: 每個月的資料解析後就交給 row_writer, 每 batch_size 筆寫出一次, 不再整批留在記憶體
+    sinks = open_sinks(args, filename, csv_headers, append=incremental)
+    pending_units = [] # 資料還在緩衝區, 尚未寫入檔案的工作單位
+
+    def commit_pending_units():
+        for stock_code, year_month in pending_units:
+            if is_final_unit(stock_code, year_month):
+                journal.mark_done(stock_code, year_month)
+        pending_units.clear()
+
+    transform = None
+    if args.typed: # 每批資料寫出前一次向量化轉換型別
+        transform = lambda rows: twse_parser.parse_daily_rows(rows, csv_headers)
+    row_writer = BatchedRowWriter(sinks, batch_size=args.batch_size, on_flush=commit_pending_units, transform=transform)
+
+    # 先建立全部工作單位
+    # 逐股模式: (序號, 股票資訊, 年月); 依日期模式: (序號, None, 日期)
+    work_units = []
+    unit_index = 0
+    if args.by_date and backfill_units is None: # 補抓時一律逐股抓取有缺口的月份
+        stock_lookup = {stock_info['股號']: stock_info for stock_info in stock_codes_to_fetch}
+        candidate_dates = twse_market_daily.trading_dates_in_range(year_month_list)
+        closed_days = month_store.closed_days(candidate_dates) # 之前已確認休市的日期 (國定假日等) 不再請求
+        if closed_days:
+            print(f"略過 {len(closed_days)} 個已確認的非交易日")
+        for date_str in candidate_dates:
+            # 所有選擇的股票在輸出檔中都已有這一天的資料才略過 (新加入 --stocks 的股票仍會抓取)
+            already_fetched = (date_str in closed_days
+                               or stock_lookup.keys() <= codes_by_date.get(f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:]}", set()))
+            if not already_fetched and not is_journal_done(twse_market_daily.JOURNAL_KEY, date_str):
+                work_units.append((unit_index, None, date_str))
+            unit_index += 1
+    else:
+        for stock_info in stock_codes_to_fetch:
+            for year_month in year_month_list:
+                if backfill_units is not None:
+                    if (stock_info['股號'], year_month) in backfill_units:
+                        work_units.append((unit_index, stock_info, year_month))
+                    unit_index += 1
+                    continue
+                # 已結束的月份在輸出檔中已有資料就略過; 當月與在月份結束前抓取的月份仍會重新抓取, 只寫入輸出檔中還沒有的日期
+                already_fetched = ((stock_info['股號'], year_month) in existing_units and is_closed_month(year_month)
+                                   and not month_store.is_partial(stock_info['股號'], year_month))
+                if not already_fetched and not is_journal_done(stock_info['股號'], year_month):
+                    work_units.append((unit_index, stock_info, year_month))
+                unit_index += 1
+
+    def fetch_unit(work_unit):
+        unit_index, stock_info, year_month = work_unit
+        if stock_info is None:
+            return get_market_daily_data(year_month, rate_limiter=rate_limiter, proxy_pool=proxy_pool, metrics=metrics)
+        return load_month(stock_info['股號'], year_month)
+
+    def report_metrics():
+        summary = metrics.summarize()
+        if not summary['requests']:
+            return
+        metrics.print_summary(summary)
+        metrics_filename = args.metrics_json or metrics_path_for(filename)
+        try:
+            metrics.write_json(metrics_filename, summary)
+            print(f"請求統計已儲存至 {metrics_filename}")
+        except OSError as e:
+            print(f"寫入請求統計 {metrics_filename} 時發生錯誤: {e}")
+
+    print(f"\n開始抓取每日成交資料... (共 {len(work_units)} 筆, 同時 {max_workers} 個請求, 每秒 {requests_per_second} 次)")
+    failed_count = 0
+    try:
+        for (unit_index, stock_info, year_month), daily_data in iter_fetch_results(work_units, fetch_unit, max_workers):
+            if stock_info is None: # 依日期模式: 一天的全市場行情
+                if daily_data is None:
+                    failed_count += 1
+                    print(f"{year_month} 全市場行情抓取失敗")
+                    continue
+                fields, data = daily_data
+                if not fields: # 查無資料: 已經過去的日期紀錄為非交易日, 下次執行不再請求
+                    month_store.put_closed_day(year_month)
+                rows = twse_market_daily.market_table_to_rows(year_month, fields, data, stock_lookup) if fields else []
+                written_codes = codes_by_date.get(f"{year_month[:4]}-{year_month[4:6]}-{year_month[6:]}")
+                if written_codes: # 略過輸出檔中已有這一天資料的股票
+                    rows = [row for row in rows if row[1] not in written_codes]
+                pending_units.append((twse_market_daily.JOURNAL_KEY, year_month))
+                row_writer.write_rows(rows)
+                print(f"{year_month} 全市場行情抓取完成 ({len(rows)} 筆)")
+                continue
+
+            stock_code = stock_info['股號']
+            stock_name = stock_info['股票名稱']
+            stock_category = stock_info['股票類別']
+            if daily_data is None:
+                failed_count += 1
                 print(f"股號 {stock_code} {stock_name} {year_month} 資料抓取失敗")
+                continue
+            rows = twse_parser.build_daily_rows(daily_data, stock_code, stock_name, stock_category)
+            already_written_dates = existing_units.get((stock_code, year_month))
+            if already_written_dates: # 當月增量抓取: 略過輸出檔中已有的日期
+                rows = [row for row in rows if twse_batch.normalize_date(row[0]) not in already_written_dates]
+            pending_units.append((stock_code, year_month))
+            row_writer.write_rows(rows)
+            print(f"股號 {stock_code} {stock_name} {year_month} 資料抓取完成")
+    except KeyboardInterrupt:
+        row_writer.close() # 緩衝區內已抓到的資料仍會寫出並紀錄進度
+        journal.close()
+        month_store.close()
+        stop_proxy_validation()
+        report_metrics()
+        print(f"\n已中斷, 進度已儲存至 {journal.path}, 請加上 --resume 重新執行以繼續抓取。")
+        return
 
-    if all_daily_data:
-        if choice == '1':
-            filename = f"stock_daily_trading_data_{year_month_list[0]}_{year_month_list[-1]}.csv"
-        else:
-            filename = f"{stock_code_input}_daily_trading_data_{year_month_list[0]}_{year_month_list[-1]}.csv"
-        save_to_csv(all_daily_data, filename, csv_headers)
+    row_writer.close()
+    month_store.close()
+    stop_proxy_validation() # 抓取已結束, 取消尚未開始的背景驗證
+    twse_http.default_pool.close()
+    report_metrics()
+
+    if row_writer.rows_written or incremental:
+        for sink in sinks:
+            print(f"資料已儲存至 {sink.filename}")
+        if args.indicators: # 對整個輸出檔 (含先前增量寫入的資料) 一次計算所有股票的指標
+            try:
+                indicators_filename = twse_indicators.write_indicators(filename)
+                print(f"技術指標已儲存至 {indicators_filename}")
+            except Exception as e:
+                print(f"計算技術指標時發生錯誤: {e}")
     else:
+        for sink in sinks:
+            if not isinstance(sink, ArchiveSink):
+                os.remove(sink.filename) # 沒有任何資料時不留下只有標題的空檔案
         print("沒有抓取到任何每日成交資料。")
 
+    if failed_count == 0:
+        journal.remove() # 全部完成才刪除進度紀錄; 有失敗的工作單位時保留, 可用 --resume 只重抓失敗的部分
+    else:
+        journal.close()
+        print(f"{failed_count} 筆資料抓取失敗, 可加上 --resume 重新執行以只重抓失敗的部分 (進度紀錄: {journal.path})")
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,280 @@
+import argparse
+import csv
+import sqlite3
+import sys
+import threading
+
+from twse_batch import normalize_date
+from twse_parser import pd
+
+# ----- 本地股價資料庫: 以 (股號, 日期) 為主鍵的 SQLite, 查詢某幾檔股票某段期間的資料只需索引查找, 不必掃描整個 CSV -----
+# 分析程式可直接匯入使用:
+#
+#   from twse_archive import StockArchive
+#   with StockArchive() as archive:
+#       closes = archive.closes(["0050", "2330"], "2023-01-01", "2023-12-31")
+#
+# 命令列:
+#   python twse_archive.py import stock_daily_trading_data_202301_202312.csv
+#   python twse_archive.py query 0050,2330 --start 2023-01-01 --end 2023-12-31 --columns close
+
+DEFAULT_DB_PATH = "twse_archive.sqlite3"
+
+# CSV 欄位 -> 資料庫欄位 (欄位順序與 CSV 輸出相同)
+COLUMNS = {
+    "日期": "date",
+    "股號": "stock_no",
+    "股票名稱": "name",
+    "股票類別": "category",
+    "成交股數": "volume",
+    "成交金額": "value",
+    "開盤價": "open",
+    "最高價": "high",
+    "最低價": "low",
+    "收盤價": "close",
+    "漲跌價差": "change",
+    "成交筆數": "trades",
+}
+DB_COLUMNS = list(COLUMNS.values())
+INT_COLUMNS = {"volume", "value", "trades"}
+FLOAT_COLUMNS = {"open", "high", "low", "close", "change"}
+
+def to_number(value, kind):
+    """
+    將 TWSE 欄位值 ("1,234", "X0.50", "--", 或已轉型的數值) 轉成 int / float, 無法轉換時返回 None
+    """
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        try:
+            number = float(value)
+        except (TypeError, ValueError): # 例如 pandas.NA
+            return None
+        if number != number: # NaN
+            return None
+        return int(number) if kind == 'int' else number
+    text = value.replace(',', '').replace('X', '').strip()
+    try:
+        return int(text) if kind == 'int' else float(text)
+    except ValueError:
+        return None
+
+def to_date(value):
+    """
+    民國日期、ISO 日期字串或日期物件 -> ISO 日期字串
+    """
+    if hasattr(value, 'strftime'):
+        return value.strftime("%Y-%m-%d")
+    return normalize_date(str(value))
+
+def to_record(row):
+    """
+    CSV 輸出資料列 (12 欄, 原始字串或具型別) -> 資料庫欄位值
+    """
+    record = []
+    for column, value in zip(DB_COLUMNS, row):
+        if column == 'date':
+            value = to_date(value)
+        elif column in INT_COLUMNS:
+            value = to_number(value, 'int')
+        elif column in FLOAT_COLUMNS:
+            value = to_number(value, 'float')
+        record.append(value)
+    return record
+
+class StockArchive:
+    """
+    本地股價資料庫 (執行緒安全)
+
+    Args:
+        db_path (str): SQLite 檔案路徑
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS daily ("
+            " stock_no TEXT NOT NULL,"
+            " date TEXT NOT NULL,"
+            " name TEXT,"
+            " category TEXT,"
+            " volume INTEGER,"
+            " value INTEGER,"
+            " open REAL,"
+            " high REAL,"
+            " low REAL,"
+            " close REAL,"
+            " change REAL,"
+            " trades INTEGER,"
+            " PRIMARY KEY (stock_no, date)) WITHOUT ROWID" # 同一檔股票的資料在磁碟上連續存放
+        )
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def add_rows(self, rows):
+        """
+        寫入 (或覆蓋) 每日成交資料列
+
+        Args:
+            rows (iterable): CSV 輸出格式的資料列 (12 欄)
+
+        Returns:
+            int: 寫入筆數
+        """
+        records = [record for record in map(to_record, rows) if record[0]]
+        placeholders = ", ".join("?" * len(DB_COLUMNS))
+        with self.lock:
+            self.conn.executemany(f"INSERT OR REPLACE INTO daily ({', '.join(DB_COLUMNS)}) VALUES ({placeholders})", records)
+            self.conn.commit()
+        return len(records)
+
+    def import_csv(self, csv_path, batch_size=50000):
+        """
+        匯入抓取程式輸出的 CSV (原始或 --typed 格式皆可, 重複匯入不會產生重複資料)
+
+        Returns:
+            int: 匯入筆數
+        """
+        count = 0
+        with open(csv_path, 'r', newline='', encoding='utf-8-sig') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            batch = []
+            for row in reader:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    count += self.add_rows(batch)
+                    batch = []
+            if batch:
+                count += self.add_rows(batch)
+        return count
+
+    def query(self, stock_codes, start=None, end=None, columns=None):
+        """
+        查詢股票在日期範圍內的每日資料 (依 股號、日期 排序)
+
+        Args:
+            stock_codes (str | list): 股號或股號列表
+            start (str, optional): 起始日期 (ISO 或民國日期, 含)
+            end (str, optional): 結束日期 (ISO 或民國日期, 含)
+            columns (list, optional): 要取得的欄位 (資料庫欄位名稱或 CSV 欄位名稱), 預設為全部
+
+        Returns:
+            list: [(stock_no, date, 欄位值...), ...]
+        """
+        if isinstance(stock_codes, str):
+            stock_codes = [stock_codes]
+        selected = [COLUMNS.get(column, column) for column in (columns or DB_COLUMNS[2:])]
+        unknown = [column for column in selected if column not in DB_COLUMNS]
+        if unknown:
+            raise ValueError(f"未知的欄位: {', '.join(unknown)}")
+        selected = ['stock_no', 'date'] + [column for column in selected if column not in ('stock_no', 'date')]
+        conditions = [f"stock_no IN ({', '.join('?' * len(stock_codes))})"]
+        params = list(stock_codes)
+        if start:
+            conditions.append("date >= ?")
+            params.append(to_date(start))
+        if end:
+            conditions.append("date <= ?")
+            params.append(to_date(end))
+        sql = f"SELECT {', '.join(selected)} FROM daily WHERE {' AND '.join(conditions)} ORDER BY stock_no, date"
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def query_frame(self, stock_codes, start=None, end=None, columns=None):
+        """
+        同 query, 返回 pandas.DataFrame (date 為 datetime64, 需安裝 pandas)
+        """
+        if pd is None:
+            raise RuntimeError("query_frame 需要安裝 pandas (pip install numpy pandas)")
+        rows = self.query(stock_codes, start, end, columns)
+        selected = [COLUMNS.get(column, column) for column in (columns or DB_COLUMNS[2:])]
+        names = ['stock_no', 'date'] + [column for column in selected if column not in ('stock_no', 'date')]
+        df = pd.DataFrame(rows, columns=names)
+        df['date'] = pd.to_datetime(df['date'])
+        return df
+
+    def closes(self, stock_codes, start=None, end=None):
+        """
+        收盤價
+
+        Returns:
+            dict: 股號 -> [(日期, 收盤價), ...]
+        """
+        result = {}
+        for stock_no, date, close in self.query(stock_codes, start, end, ['close']):
+            result.setdefault(stock_no, []).append((date, close))
+        return result
+
+    def stocks(self):
+        """
+        資料庫中所有股號與其資料日期範圍
+
+        Returns:
+            list: [(股號, 最早日期, 最晚日期, 筆數), ...]
+        """
+        with self.lock:
+            return self.conn.execute(
+                "SELECT stock_no, MIN(date), MAX(date), COUNT(*) FROM daily GROUP BY stock_no ORDER BY stock_no"
+            ).fetchall()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+class ArchiveSink:
+    """
+    抓取程式的輸出目標之一: 每批資料寫入 StockArchive (與 CsvSink / ParquetSink 同樣介面)
+
+    Args:
+        db_path (str): SQLite 檔案路徑
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.filename = db_path
+        self.archive = StockArchive(db_path)
+
+    def write_batch(self, rows):
+        if hasattr(rows, 'itertuples'): # 具型別 DataFrame
+            rows = rows.itertuples(index=False, name=None)
+        self.archive.add_rows(rows)
+
+    def close(self):
+        self.archive.close()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="本地股價資料庫")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help=f"資料庫檔案 (預設 {DEFAULT_DB_PATH})")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    import_parser = subparsers.add_parser('import', help="匯入抓取程式輸出的 CSV")
+    import_parser.add_argument('csv_files', nargs='+')
+    query_parser = subparsers.add_parser('query', help="查詢股票在日期範圍內的資料")
+    query_parser.add_argument('stocks', help="股號, 以逗號分隔 (例如 0050,2330)")
+    query_parser.add_argument('--start', help="起始日期 (例如 2023-01-01)")
+    query_parser.add_argument('--end', help="結束日期 (例如 2023-12-31)")
+    query_parser.add_argument('--columns', help=f"欄位, 以逗號分隔 (可用: {', '.join(DB_COLUMNS[2:])})")
+    subparsers.add_parser('stocks', help="列出資料庫中的股號與日期範圍")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    with StockArchive(args.db) as archive:
+        if args.command == 'import':
+            for csv_file in args.csv_files:
+                print(f"{csv_file}: 匯入 {archive.import_csv(csv_file)} 筆")
+        elif args.command == 'query':
+            columns = args.columns.split(',') if args.columns else None
+            writer = csv.writer(sys.stdout)
+            for row in archive.query([code.strip() for code in args.stocks.split(',')], args.start, args.end, columns):
+                writer.writerow(row)
+        else:
+            for stock_no, first_date, last_date, count in archive.stocks():
+                print(f"{stock_no}\t{first_date} ~ {last_date}\t{count} 筆")
@@ -0,0 +1,132 @@
+import csv
+import json
+import os
+import time
+
+# ----- 非互動批次模式: 股號清單/日期範圍解析, 以及掃描既有輸出檔以略過已抓取的 (股號, 年月) -----
+
+STOCK_GROUPS = {
+    'all': None, # 全部股票
+    'etf': 'ETF',
+    'stocks': '個股',
+}
+
+def month_range(start_date_str, end_date_str):
+    """
+    產生起始年月到結束年月的年月列表
+
+    Args:
+        start_date_str (str): 起始年月 (YYYY/MM, 例如: 2024/01)
+        end_date_str (str): 結束年月 (YYYY/MM, 例如: 2024/12)
+
+    Returns:
+        list: 年月列表，格式為YYYYMM (例如: ['202401', '202402', ...])
+
+    Raises:
+        ValueError: 日期格式錯誤, 或起始年月晚於結束年月
+    """
+    start_year_month = time.strptime(start_date_str, "%Y/%m")
+    end_year_month = time.strptime(end_date_str, "%Y/%m")
+    if start_year_month > end_year_month:
+        raise ValueError("起始年月不能晚於結束年月")
+    year, month = start_year_month.tm_year, start_year_month.tm_mon
+    year_month_list = []
+    while (year, month) <= (end_year_month.tm_year, end_year_month.tm_mon):
+        year_month_list.append(f"{year}{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return year_month_list
+
+def read_stock_list_file(path):
+    """
+    讀取股號清單檔 (每行一個股號或以逗號分隔, # 之後為註解)
+    """
+    codes = []
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        for line in f:
+            line = line.split('#', 1)[0]
+            codes.extend(code.strip() for code in line.split(',') if code.strip())
+    return codes
+
+def select_stocks(spec, all_stock_info, stock_index):
+    """
+    依股號規格選出要抓取的股票
+
+    Args:
+        spec (str): "all" / "etf" / "stocks", 以逗號分隔的股號 (例如 "2330,0050"), 或 "@清單檔路徑"
+        all_stock_info (list): 證券主檔
+        stock_index (dict): 股號索引
+
+    Returns:
+        tuple: (股票資訊列表, 找不到的股號列表)
+    """
+    spec = spec.strip()
+    if spec.lower() in STOCK_GROUPS:
+        category = STOCK_GROUPS[spec.lower()]
+        return [info for info in all_stock_info if category is None or info['股票類別'] == category], []
+    if spec.startswith('@'):
+        codes = read_stock_list_file(spec[1:])
+    else:
+        codes = [code.strip() for code in spec.split(',') if code.strip()]
+    selected = []
+    missing = []
+    for code in dict.fromkeys(codes): # 去除重複但保留順序
+        if code in stock_index:
+            selected.append(stock_index[code])
+        else:
+            missing.append(code)
+    return selected, missing
+
+def load_config(path):
+    """
+    讀取批次設定檔 (JSON), 鍵名與命令列參數相同 (例如 {"stocks": "etf", "start": "2024/01", "end": "2024/12"})
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    return {key.replace('-', '_'): value for key, value in config.items()}
+
+def normalize_date(date_str):
+    """
+    將民國日期 (113/01/02) 或 ISO 日期 (2024-01-02) 統一轉成 ISO 日期字串, 無法解析時返回 None
+    """
+    date_str = date_str.strip()
+    try:
+        if '/' in date_str:
+            year, month, day = date_str.split('/')
+            return f"{int(''.join(c for c in year if c.isdigit())) + 1911}-{int(month):02d}-{int(day):02d}"
+        if '-' in date_str:
+            year, month, day = date_str.split('-')
+            return f"{int(year)}-{int(month):02d}-{int(day):02d}"
+    except ValueError:
+        return None
+    return None
+
+def scan_existing_output(filename, year_months=None):
+    """
+    掃描既有的輸出 CSV, 找出已經抓取過的 (股號, 年月) 與其中的日期
+
+    Args:
+        filename (str): 輸出 CSV 檔名
+        year_months (iterable, optional): 只保留這些年月 (YYYYMM) 的資料, 記憶體用量只與本次抓取的範圍有關,
+                                          不隨輸出檔累積的年份增加. Defaults to None (全部保留).
+
+    Returns:
+        dict: (股號, YYYYMM) -> 已存在的 ISO 日期集合
+    """
+    existing = {}
+    if not os.path.exists(filename):
+        return existing
+    year_months = set(year_months) if year_months is not None else None
+    with open(filename, 'r', newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        next(reader, None) # 跳過標題
+        for row in reader:
+            if len(row) < 2:
+                continue
+            iso_date = normalize_date(row[0])
+            if iso_date is None:
+                continue
+            year_month = iso_date[:4] + iso_date[5:7]
+            if year_months is not None and year_month not in year_months:
+                continue
+            existing.setdefault((row[1], year_month), set()).add(iso_date)
+    return existing
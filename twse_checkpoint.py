@@ -0,0 +1,64 @@
+import json
+import os
+
+# ----- 批次抓取進度紀錄 (append-only JSONL) -----
+# 每個 (股號, 年月) 工作單位的資料寫入輸出檔後就紀錄一行, 程式中斷後可用 --resume 略過已完成的部分,
+# 並接續寫入原本的輸出檔。依日期抓取模式以 (MI_INDEX, 日期) 作為工作單位紀錄。
+
+def journal_path_for(output_filename):
+    """
+    取得輸出檔對應的進度紀錄檔名稱
+    """
+    return f"{output_filename}.progress.jsonl"
+
+class CheckpointJournal:
+    """
+    工作單位完成紀錄
+
+    Args:
+        path (str): 進度紀錄檔路徑
+        resume (bool): True 時保留並讀取既有紀錄; False 時清空重新開始
+    """
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.completed = set()
+        if resume:
+            self.completed = self._load()
+        self.file = open(path, 'a' if resume else 'w', encoding='utf-8')
+
+    def _load(self):
+        completed = set()
+        if not os.path.exists(self.path):
+            return completed
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue # 中斷時最後一行可能只寫了一半, 直接略過
+                completed.add((entry['stock_no'], entry['year_month']))
+        return completed
+
+    def is_done(self, stock_code, year_month):
+        return (stock_code, year_month) in self.completed
+
+    def mark_done(self, stock_code, year_month):
+        """
+        紀錄一個已完成的工作單位 (立即寫入檔案)
+        """
+        self.completed.add((stock_code, year_month))
+        entry = {'stock_no': stock_code, 'year_month': year_month}
+        self.file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def remove(self):
+        """
+        全部完成後刪除進度紀錄檔
+        """
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,48 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# ----- (股號, 年月) 工作單位的並行抓取引擎 -----
+# 同時保持 max_workers 個請求在進行中, 實際請求速率由 fetch_func 內使用的 RateLimiter 控制,
+# 因此整體耗時取決於 TWSE 允許的速率, 而不是每個請求的來回延遲。
+
+def iter_fetch_results(work_units, fetch_func, max_workers=8):
+    """
+    並行執行所有工作單位, 依完成順序逐一回傳結果
+
+    為了讓記憶體使用量固定, 同時提交的工作最多只有 max_workers * 2 個,
+    完成一個才再補上一個。
+
+    Args:
+        work_units (iterable): 工作單位, 每個元素會原封不動傳給 fetch_func
+        fetch_func (callable): fetch_func(work_unit) -> 抓取結果
+        max_workers (int): 同時進行中的請求數上限
+
+    Yields:
+        tuple: (work_unit, 抓取結果), 若 fetch_func 拋出例外則結果為 None
+    """
+    work_iter = iter(work_units)
+    max_pending = max_workers * 2
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    pending = {}
+    try:
+        for work_unit in work_iter:
+            pending[executor.submit(fetch_func, work_unit)] = work_unit
+            if len(pending) >= max_pending:
+                break
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                work_unit = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"工作單位 {work_unit} 執行時發生錯誤: {e}")
+                    result = None
+                yield work_unit, result
+
+                next_unit = next(work_iter, None)
+                if next_unit is not None:
+                    pending[executor.submit(fetch_func, next_unit)] = next_unit
+    finally:
+        # 正常結束或中途中斷 (例如 Ctrl-C) 時, 取消尚未開始的工作
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,103 @@
+import csv
+
+from twse_batch import normalize_date
+from twse_fetch_engine import iter_fetch_results
+
+# ----- 資料缺口分析: 以參考股票 (預設 0050) 的交易日作為交易所行事曆, 找出輸出檔中每檔股票缺少交易日的 (股號, 年月) -----
+# 只重抓有缺口的工作單位, 不必重跑整個日期範圍。
+
+DEFAULT_REFERENCE_CODE = "0050"
+
+def dates_of_rows(daily_data):
+    """
+    STOCK_DAY 資料列 -> ISO 日期集合
+    """
+    dates = set()
+    for day_data in daily_data or []:
+        iso_date = normalize_date(day_data[0])
+        if iso_date:
+            dates.add(iso_date)
+    return dates
+
+def build_exchange_calendar(year_month_list, existing_units, load_reference_month, reference_code=DEFAULT_REFERENCE_CODE, max_workers=8):
+    """
+    建立每個月份的交易日集合
+
+    每個月份都以 load_reference_month 取得參考股票的資料 (已結束的月份由本地月資料讀取, 其餘連網抓取),
+    不使用正在檢查的輸出檔中的日期, 參考股票本身缺少的交易日才會被找出來。
+    參考股票的資料取不到時, 改用輸出檔中所有股票該月日期的聯集。
+
+    Args:
+        year_month_list (list): 年月列表，格式為YYYYMM
+        existing_units (dict): twse_batch.scan_existing_output 的回傳值
+        load_reference_month (callable): (股號, 年月) -> 每日成交資料列表, 失敗時返回 None
+        reference_code (str): 參考股票代號
+        max_workers (int): 同時抓取的月份數
+
+    Returns:
+        dict: 年月 -> ISO 日期集合
+    """
+    calendar = {}
+    for year_month, daily_data in iter_fetch_results(year_month_list, lambda ym: load_reference_month(reference_code, ym), max_workers):
+        if daily_data is None:
+            fallback_dates = set()
+            for (stock_code, unit_month), dates in existing_units.items():
+                if unit_month == year_month:
+                    fallback_dates |= dates
+            print(f"無法取得參考股票 {reference_code} {year_month} 的資料, 改用輸出檔中的日期 ({len(fallback_dates)} 天)")
+            calendar[year_month] = fallback_dates
+        else:
+            calendar[year_month] = dates_of_rows(daily_data)
+    return calendar
+
+def find_gaps(stock_codes, year_month_list, calendar, existing_units, load_stored_month=None):
+    """
+    找出需要補抓的 (股號, 年月)
+
+    - 已結束月份的本地月資料 (load_stored_month) 中的日期都已在輸出檔中時, 缺少的日期視為停牌, 不列入缺口;
+      本地月資料為空 (查無交易資料) 的月份即尚未上市 (或下市) 的月份, 同樣不列入
+    - 沒有本地月資料可證明的月份一律列入 (包含輸出檔中第一個有資料的月份之前的月份), 補抓一次後即有本地月資料
+
+    Args:
+        stock_codes (list): 股號列表
+        year_month_list (list): 年月列表，格式為YYYYMM
+        calendar (dict): build_exchange_calendar 的回傳值
+        existing_units (dict): twse_batch.scan_existing_output 的回傳值
+        load_stored_month (callable, optional): (股號, 年月) -> 本地已儲存的每日成交資料列表 (例如 MonthStore.get_closed)
+
+    Returns:
+        list: [(股號, 年月, 缺少的交易日數), ...]
+    """
+    gaps = []
+    for stock_code in stock_codes:
+        for year_month in year_month_list:
+            expected_dates = calendar.get(year_month)
+            if not expected_dates:
+                continue
+            existing_dates = existing_units.get((stock_code, year_month), set())
+            missing_dates = expected_dates - existing_dates
+            if not missing_dates:
+                continue
+            if load_stored_month:
+                stored_data = load_stored_month(stock_code, year_month)
+                if stored_data is not None and dates_of_rows(stored_data) <= existing_dates:
+                    continue
+            gaps.append((stock_code, year_month, len(missing_dates)))
+    return gaps
+
+def gaps_path_for(output_filename):
+    """
+    取得補抓清單檔名稱 (與輸出檔放在一起)
+    """
+    base = output_filename[:-4] if output_filename.lower().endswith('.csv') else output_filename
+    return f"{base}_gaps.csv"
+
+def write_gap_list(path, gaps):
+    """
+    輸出補抓清單 CSV (股號, 年月, 缺少交易日數)
+    """
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(["股號", "年月", "缺少交易日數"])
+        writer.writerows(gaps)
+    return path
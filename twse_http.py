@@ -0,0 +1,104 @@
+import threading
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# ----- 共用的 HTTP 連線池: 每個 proxy (或直接連線) 一個 requests.Session, 重複使用 keep-alive 連線 -----
+# 避免每次 requests.get 都重新建立 TCP + TLS 連線。
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+
+def session_key(proxies):
+    """
+    proxies 參數 -> Session 識別鍵 (None 表示直接連線)
+    """
+    if not proxies:
+        return None
+    return tuple(sorted(proxies.items()))
+
+class SessionPool:
+    """
+    依 proxy 分開的 requests.Session 池 (執行緒安全)
+
+    每個 Session 使用有上限的連線池 (pool_maxsize), 連線數滿時請求會等待可用連線;
+    Session 數量超過 max_sessions 時關閉最久沒用的 Session。
+
+    Args:
+        pool_maxsize (int): 每個 Session 對同一主機保留的連線數上限 (建議不小於同時請求數)
+        max_sessions (int): 最多保留的 Session 數 (每個 proxy 一個)
+        headers (dict, optional): 每個 Session 的預設標頭
+    """
+
+    def __init__(self, pool_maxsize=16, max_sessions=64, headers=None):
+        self.pool_maxsize = pool_maxsize
+        self.max_sessions = max_sessions
+        self.headers = dict(headers or DEFAULT_HEADERS)
+        self.lock = threading.Lock()
+        self.sessions = OrderedDict()
+
+    def _new_session(self, proxies):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_maxsize, pool_block=True, max_retries=0)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update(self.headers)
+        if proxies:
+            session.proxies.update(proxies)
+        return session
+
+    def get_session(self, proxies=None):
+        """
+        取得對應 proxy 的 Session (不存在則建立)
+        """
+        key = session_key(proxies)
+        with self.lock:
+            session = self.sessions.get(key)
+            if session is not None:
+                self.sessions.move_to_end(key)
+                return session
+            session = self._new_session(proxies)
+            self.sessions[key] = session
+            evicted = []
+            while len(self.sessions) > self.max_sessions:
+                evicted.append(self.sessions.popitem(last=False)[1])
+        for old_session in evicted:
+            old_session.close()
+        return session
+
+    def configure(self, pool_maxsize=None, max_sessions=None):
+        """
+        調整之後建立的 Session 的連線池大小
+        """
+        with self.lock:
+            if pool_maxsize:
+                self.pool_maxsize = pool_maxsize
+            if max_sessions:
+                self.max_sessions = max_sessions
+
+    def close(self):
+        with self.lock:
+            sessions = list(self.sessions.values())
+            self.sessions.clear()
+        for session in sessions:
+            session.close()
+
+# 所有 TWSE 抓取函式共用的連線池
+default_pool = SessionPool()
+
+# 所有 TWSE 抓取函式共用的回應快取 (twse_http_cache.ResponseCache), 未啟用時為 None
+default_cache = None
+
+def get_session(proxies=None):
+    return default_pool.get_session(proxies)
+
+def set_response_cache(cache):
+    """
+    設定 (或以 None 停用) 共用的回應快取
+    """
+    global default_cache
+    default_cache = cache
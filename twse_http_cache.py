@@ -0,0 +1,197 @@
+import datetime
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import urlparse, parse_qs
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import twse_json
+from twse_month_store import month_end_time
+
+# ----- TWSE 回應快取 (SQLite, 以完整網址含參數為鍵) -----
+# 依端點決定有效期限; 過期的項目若有 ETag / Last-Modified, 以條件請求重新驗證, 伺服器回 304 時沿用快取內容。
+# 在月份結束後才抓取的 STOCK_DAY 與在當天結束後才抓取的 MI_INDEX 不會再變動, 永久有效; 重複執行開發/測試時不需任何連線。
+# 期間還沒結束時抓取的回應即使期間已結束也只依一般期限有效, 過期後重新抓取; stat 不是 OK 的回應 (例如資料尚未公布) 不快取。
+
+DEFAULT_DB_PATH = "twse_http_cache.sqlite3"
+FOREVER = None # 永久有效
+
+def day_end_time(date_str):
+    """
+    日期結束的時間 (次日 00:00 本地時間)
+
+    Args:
+        date_str (str): 日期，格式為YYYYMMDD
+
+    Returns:
+        float: epoch 秒數
+    """
+    next_day = datetime.datetime.strptime(date_str, "%Y%m%d") + datetime.timedelta(days=1)
+    return time.mktime(next_day.timetuple())
+
+def endpoint_ttl(url, stored_at=None):
+    """
+    依端點、查詢參數與快取時間決定快取有效秒數
+
+    Args:
+        url (str): 完整網址
+        stored_at (float, optional): 回應存入快取的時間; 在查詢期間結束後才存入的回應永久有效
+
+    Returns:
+        float: 有效秒數, FOREVER (None) 表示永久有效, 0 表示不快取
+    """
+    parsed = urlparse(url)
+    query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+    path = parsed.path
+    if path.endswith('/ETF/domestic') or path.endswith('/BWIBBU_d'):
+        return 12 * 60 * 60 # 證券主檔一天內很少變動
+    if path.endswith('/STOCK_DAY'):
+        period_end, ttl = month_end_time, 60 * 60
+        period = query.get('date', '')[:6]
+    elif path.endswith('/MI_INDEX'):
+        period_end, ttl = day_end_time, 10 * 60
+        period = query.get('date', '')
+    else:
+        return 0
+    try:
+        if stored_at is not None and stored_at >= period_end(period):
+            return FOREVER
+    except ValueError: # 日期參數格式不正確
+        pass
+    return ttl
+
+def is_ok_stat(content):
+    """
+    TWSE 回應的 stat 是否為 OK (沒有 stat 欄位的端點視為 OK; 無法解析的內容視為不 OK)
+    """
+    try:
+        data = twse_json.loads(content)
+    except json.JSONDecodeError:
+        return False
+    return not isinstance(data, dict) or data.get('stat', 'OK') == 'OK'
+
+class ResponseCache:
+    """
+    磁碟上的 HTTP 回應快取 (執行緒安全, 多個行程可共用同一個檔案)
+
+    Args:
+        db_path (str): SQLite 檔案路徑
+        ttl_policy (callable): (url, stored_at) -> 有效秒數 (見 endpoint_ttl)
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, ttl_policy=endpoint_ttl):
+        self.db_path = db_path
+        self.ttl_policy = ttl_policy
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " url TEXT PRIMARY KEY,"
+            " headers_json TEXT NOT NULL,"
+            " encoding TEXT,"
+            " body BLOB NOT NULL,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " stored_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+        self.hits = 0
+        self.revalidations = 0
+
+    def _load(self, url):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT headers_json, encoding, body, etag, last_modified, stored_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+
+    @staticmethod
+    def _to_response(url, row):
+        response = requests.models.Response()
+        response.status_code = 200
+        response.url = url
+        response.headers = CaseInsensitiveDict(json.loads(row[0]))
+        response.encoding = row[1]
+        response._content = zlib.decompress(row[2])
+        response.elapsed = datetime.timedelta(0)
+        return response
+
+    def get_fresh(self, url):
+        """
+        取得仍在有效期限內的快取回應
+
+        Returns:
+            requests.Response: 快取的回應, 沒有或已過期時返回 None
+        """
+        if self.ttl_policy(url) == 0:
+            return None
+        row = self._load(url)
+        if row is None:
+            return None
+        ttl = self.ttl_policy(url, row[5])
+        if ttl is not FOREVER and time.time() - row[5] >= ttl:
+            return None
+        self.hits += 1
+        return self._to_response(url, row)
+
+    def conditional_headers(self, url):
+        """
+        過期項目的條件請求標頭 (If-None-Match / If-Modified-Since), 沒有驗證資訊時為空 dict
+        """
+        row = self._load(url)
+        if row is None:
+            return {}
+        conditional = {}
+        if row[3]:
+            conditional['If-None-Match'] = row[3]
+        if row[4]:
+            conditional['If-Modified-Since'] = row[4]
+        return conditional
+
+    def revalidated(self, url):
+        """
+        伺服器回 304 (內容未變動): 更新快取時間並返回快取的回應
+        """
+        with self.lock:
+            self.conn.execute("UPDATE responses SET stored_at = ? WHERE url = ?", (time.time(), url))
+            self.conn.commit()
+        row = self._load(url)
+        if row is None:
+            return None
+        self.revalidations += 1
+        return self._to_response(url, row)
+
+    def store(self, url, response):
+        """
+        儲存成功的 JSON 回應 (依 ttl_policy 不快取的端點與 stat 不是 OK 的回應略過)
+        """
+        if self.ttl_policy(url) == 0 or response.status_code != 200:
+            return
+        if 'json' not in response.headers.get('Content-Type', '').lower():
+            return
+        if not is_ok_stat(response.content): # 例如當天資料尚未公布時的「沒有符合條件的資料」, 不能當作最終結果
+            return
+        headers = {key: value for key, value in response.headers.items() if key.lower() in ('content-type', 'etag', 'last-modified')}
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (url, headers_json, encoding, body, etag, last_modified, stored_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, json.dumps(headers), response.encoding, zlib.compress(response.content),
+                 response.headers.get('ETag'), response.headers.get('Last-Modified'), time.time())
+            )
+            self.conn.commit()
+
+    def invalidate(self, url):
+        """
+        刪除一個網址的快取 (例如 --refresh-master 強制重新抓取證券主檔)
+        """
+        with self.lock:
+            self.conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,98 @@
+import twse_parser
+from twse_parser import pd
+
+# ----- 抓取後的技術指標計算: 一次對所有股票做分組滾動計算 (pandas groupby rolling/ewm), 不逐檔用 Python 迴圈 -----
+# 指標: 日報酬率、移動平均 (MA5/MA20/MA60)、RSI (Wilder)、成交量 Z 分數
+
+CODE_COLUMN = "股號"
+DATE_COLUMN = "日期"
+CLOSE_COLUMN = "收盤價"
+VOLUME_COLUMN = "成交股數"
+
+def load_daily_frame(csv_path):
+    """
+    讀取每日成交資料 CSV 中計算指標需要的欄位 (原始字串或 --typed 輸出皆可)
+
+    Returns:
+        pandas.DataFrame: 股號、日期 (datetime64)、收盤價 (float)、成交股數 (float)
+    """
+    df = pd.read_csv(
+        csv_path,
+        usecols=[DATE_COLUMN, CODE_COLUMN, CLOSE_COLUMN, VOLUME_COLUMN],
+        dtype=str,
+        encoding='utf-8-sig',
+        keep_default_na=False
+    )
+    dates = df[DATE_COLUMN]
+    roc_mask = dates.str.contains('/', regex=False)
+    parsed_dates = pd.to_datetime(dates.where(~roc_mask), format="%Y-%m-%d", errors="coerce")
+    if roc_mask.any():
+        parsed_dates[roc_mask] = twse_parser.roc_to_iso_dates(dates[roc_mask])
+    df[DATE_COLUMN] = parsed_dates
+    df[CLOSE_COLUMN] = twse_parser.to_number(df[CLOSE_COLUMN]).astype(float)
+    df[VOLUME_COLUMN] = twse_parser.to_number(df[VOLUME_COLUMN]).astype(float)
+    return df.dropna(subset=[DATE_COLUMN])
+
+def compute_indicators(df, ma_windows=(5, 20, 60), rsi_period=14, zscore_window=20):
+    """
+    計算所有股票的技術指標
+
+    Args:
+        df (pandas.DataFrame): load_daily_frame 的回傳值
+        ma_windows (tuple): 移動平均天數
+        rsi_period (int): RSI 天數
+        zscore_window (int): 成交量 Z 分數的滾動天數
+
+    Returns:
+        pandas.DataFrame: 依 股號、日期 排序, 附加 日報酬率、MA{n}、RSI{n}、量Z分數{n} 欄位
+    """
+    df = df.sort_values([CODE_COLUMN, DATE_COLUMN]).drop_duplicates([CODE_COLUMN, DATE_COLUMN], keep='last')
+    df = df.reset_index(drop=True)
+    codes = df[CODE_COLUMN]
+    close_groups = df.groupby(CODE_COLUMN, sort=False)[CLOSE_COLUMN]
+
+    df['日報酬率'] = close_groups.pct_change(fill_method=None)
+
+    for window in ma_windows:
+        df[f'MA{window}'] = close_groups.rolling(window, min_periods=window).mean().reset_index(level=0, drop=True)
+
+    delta = close_groups.diff()
+    gain = delta.clip(lower=0)
+    loss = -delta.clip(upper=0)
+    alpha = 1.0 / rsi_period
+    avg_gain = gain.groupby(codes, sort=False).ewm(alpha=alpha, adjust=False, min_periods=rsi_period).mean().reset_index(level=0, drop=True)
+    avg_loss = loss.groupby(codes, sort=False).ewm(alpha=alpha, adjust=False, min_periods=rsi_period).mean().reset_index(level=0, drop=True)
+    rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+    df[f'RSI{rsi_period}'] = rsi.where(avg_loss != 0, 100.0).where(avg_gain.notna())
+
+    volume_groups = df.groupby(CODE_COLUMN, sort=False)[VOLUME_COLUMN]
+    volume_mean = volume_groups.rolling(zscore_window, min_periods=zscore_window).mean().reset_index(level=0, drop=True)
+    volume_std = volume_groups.rolling(zscore_window, min_periods=zscore_window).std().reset_index(level=0, drop=True)
+    df[f'量Z分數{zscore_window}'] = (df[VOLUME_COLUMN] - volume_mean) / volume_std.where(volume_std != 0)
+    return df
+
+def indicators_path_for(output_filename):
+    """
+    取得指標輸出檔名稱 (與每日成交資料放在一起)
+    """
+    base = output_filename[:-4] if output_filename.lower().endswith('.csv') else output_filename
+    return f"{base}_indicators.csv"
+
+def write_indicators(csv_path, output_path=None):
+    """
+    從每日成交資料 CSV 計算技術指標並輸出 CSV
+
+    Returns:
+        str: 指標輸出檔路徑
+    """
+    if pd is None:
+        raise RuntimeError("計算技術指標需要安裝 numpy 與 pandas (pip install numpy pandas)")
+    output_path = output_path or indicators_path_for(csv_path)
+    df = load_daily_frame(csv_path)
+    passthrough_columns = list(df.columns)
+    result = compute_indicators(df)
+    indicator_columns = [column for column in result.columns if column not in passthrough_columns]
+    result[indicator_columns] = result[indicator_columns].round(6) # 只對計算出的指標四捨五入, 原始收盤價與成交股數照原值輸出
+    result[VOLUME_COLUMN] = result[VOLUME_COLUMN].round().astype('Int64') # 成交股數維持整數
+    result.to_csv(output_path, index=False, encoding='utf-8-sig', date_format='%Y-%m-%d')
+    return output_path
@@ -0,0 +1,44 @@
+import json
+
+try:
+    import orjson
+except ImportError: # 選用: 未安裝 orjson 時改用 msgspec 或標準函式庫 json
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# ----- 快速 JSON 解析: 依序使用 orjson、msgspec, 都未安裝時使用標準函式庫 json -----
+# 解析失敗一律拋出 json.JSONDecodeError, 呼叫端原本的例外處理不需修改。
+
+if orjson is not None:
+    BACKEND = "orjson"
+elif msgspec is not None:
+    BACKEND = "msgspec"
+    _msgspec_decoder = msgspec.json.Decoder()
+else:
+    BACKEND = "json"
+
+def loads(data):
+    """
+    解析 JSON (bytes 或 str)
+
+    Raises:
+        json.JSONDecodeError: 內容不是正確的 JSON
+    """
+    if BACKEND == "orjson":
+        return orjson.loads(data) # orjson.JSONDecodeError 為 json.JSONDecodeError 的子類別
+    if BACKEND == "msgspec":
+        try:
+            return _msgspec_decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise json.JSONDecodeError(str(e), data if isinstance(data, str) else "", 0) from None
+    return json.loads(data)
+
+def decode_response(response):
+    """
+    解析 HTTP 回應內容 (取代 response.json(), 直接解析原始 bytes, 不先解碼成字串)
+    """
+    return loads(response.content)
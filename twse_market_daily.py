@@ -0,0 +1,91 @@
+import datetime
+import re
+from operator import itemgetter
+
+# ----- 依日期抓取模式: 每個交易日一次取得全市場收盤行情 (MI_INDEX), 再於本地轉成逐股的每日成交資料列 -----
+# 逐股逐月抓取約需 股票數 x 月份數 次請求; 依日期抓取只需 交易日數 次請求。
+
+JOURNAL_KEY = "MI_INDEX" # 進度紀錄中代表「全市場」的股號欄位值
+
+HTML_TAG_PATTERN = re.compile(r"<[^>]*>")
+
+def trading_dates_in_range(year_month_list, today=None):
+    """
+    產生年月範圍內所有可能的交易日 (週一至週五, 不含今天以後)
+
+    國定假日無法事先得知, 這些日期請求後會得到「沒有符合條件的資料」, 視為無資料
+    (已經過去的日期會紀錄在 MonthStore 的非交易日表, 之後的執行不再請求)。
+
+    Args:
+        year_month_list (list): 年月列表，格式為YYYYMM (例如: ['202401', '202402'])
+        today (datetime.date, optional): 今天日期 (預設為系統日期)
+
+    Returns:
+        list: 日期列表，格式為YYYYMMDD
+    """
+    today = today or datetime.date.today()
+    dates = []
+    for year_month in year_month_list:
+        day = datetime.date(int(year_month[:4]), int(year_month[4:]), 1)
+        while day.month == int(year_month[4:]) and day <= today:
+            if day.weekday() < 5:
+                dates.append(day.strftime("%Y%m%d"))
+            day += datetime.timedelta(days=1)
+    return dates
+
+def to_roc_date(date_str):
+    """
+    將YYYYMMDD 轉成 STOCK_DAY 使用的民國日期格式 (例如: 20240102 -> 113/01/02)
+    """
+    return f"{int(date_str[:4]) - 1911}/{date_str[4:6]}/{date_str[6:]}"
+
+def find_stock_table(json_data):
+    """
+    從 MI_INDEX 回應中找出「每日收盤行情」個股表格
+
+    新版 (rwd) API 放在 tables 列表中, 舊版 API 則為 fieldsN / dataN 欄位。
+
+    Returns:
+        tuple: (fields, data), 找不到時返回 (None, None)
+    """
+    for table in json_data.get('tables', []):
+        fields = table.get('fields') or []
+        if '證券代號' in fields and '收盤價' in fields:
+            return fields, table.get('data') or []
+    for key, fields in json_data.items():
+        if key.startswith('fields') and isinstance(fields, list) and '證券代號' in fields and '收盤價' in fields:
+            return fields, json_data.get('data' + key[len('fields'):]) or []
+    return None, None
+
+def market_table_to_rows(date_str, fields, data, stock_lookup):
+    """
+    將一天的全市場行情轉成逐股每日成交資料列 (欄位順序與 STOCK_DAY 的 CSV 輸出相同)
+
+    Args:
+        date_str (str): 交易日，格式為YYYYMMDD
+        fields (list): MI_INDEX 個股表格欄位名稱
+        data (list): MI_INDEX 個股表格資料
+        stock_lookup (dict): 股號 -> 股票資訊 ({'股號', '股票名稱', '股票類別'}), 只輸出其中的股號
+
+    Returns:
+        list: 每日成交資料列
+    """
+    index = {name: i for i, name in enumerate(fields)}
+    roc_date = to_roc_date(date_str)
+    code_index = index['證券代號']
+    sign_index = index.get('漲跌(+/-)')
+    change_index = index['漲跌價差']
+    trades_index = index['成交筆數']
+    pick_prices = itemgetter(*(index[name] for name in ('成交股數', '成交金額', '開盤價', '最高價', '最低價', '收盤價'))) # 一次取出 6 個欄位
+    rows = []
+    for record in data:
+        stock_info = stock_lookup.get(record[code_index].strip())
+        if stock_info is None:
+            continue
+        sign = HTML_TAG_PATTERN.sub('', record[sign_index]).strip() if sign_index is not None else ''
+        change = (sign if sign in ('+', '-', 'X') else ' ') + record[change_index] # 與 STOCK_DAY 相同格式, 例如 +5.00 / -0.50 / X0.00
+        rows.append([
+            roc_date, stock_info['股號'], stock_info['股票名稱'], stock_info['股票類別'],
+            *pick_prices(record), change, record[trades_index]
+        ])
+    return rows
@@ -0,0 +1,198 @@
+import json
+import threading
+import time
+
+# ----- 每個請求的計時與結果紀錄: 抓取結束後輸出摘要 (延遲分布、各 proxy 統計、最慢的股票) 與 JSON 檔 -----
+# requests 無法分開取得 DNS 與 TCP/TLS 連線時間, 因此紀錄:
+#   wait  : 等待速率限制器的時間
+#   ttfb  : 送出請求到收到回應標頭的時間 (response.elapsed, 新連線時包含 DNS 與連線時間)
+#   total : 送出請求到讀完回應內容的時間
+
+LATENCY_BUCKETS = [0.1, 0.25, 0.5, 1, 2, 5, 10] # 延遲分布的區間上限 (秒)
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def outcome_of(error):
+    """
+    將例外分類為結果名稱
+    """
+    name = type(error).__name__
+    return {
+        'TwseThrottledError': 'throttled',
+        'ProxyError': 'proxy_error',
+        'ConnectTimeout': 'timeout',
+        'ReadTimeout': 'timeout',
+        'Timeout': 'timeout',
+        'ConnectionError': 'connection_error',
+        'HTTPError': 'http_error',
+    }.get(name, 'error')
+
+def histogram(values, buckets=LATENCY_BUCKETS):
+    """
+    計算延遲分布
+
+    Returns:
+        list: [(區間名稱, 筆數), ...]
+    """
+    counts = [0] * (len(buckets) + 1)
+    for value in values:
+        for i, upper in enumerate(buckets):
+            if value < upper:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+    labels = [f"< {upper}s" for upper in buckets] + [f">= {buckets[-1]}s"]
+    return list(zip(labels, counts))
+
+class RequestMetrics:
+    """
+    請求紀錄收集器 (執行緒安全)
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.records = []
+        self.started_at = time.time()
+
+    def record(self, label, endpoint, proxy, attempt, outcome, status=None, wait=0.0, ttfb=None, total=None, size=0):
+        """
+        紀錄一次 HTTP 請求
+
+        Args:
+            label (str): 工作單位名稱 (例如 "2330 202401")
+            endpoint (str): 端點名稱 (例如 STOCK_DAY)
+            proxy (str): 使用的 proxy (直接連線為 None)
+            attempt (int): 第幾次嘗試 (0 為第一次, 之後為重試)
+            outcome (str): 結果 (ok / throttled / timeout / proxy_error / http_error ...)
+            status (int, optional): HTTP 狀態碼
+            wait (float): 等待速率限制器的秒數
+            ttfb (float, optional): 收到回應標頭的秒數
+            total (float, optional): 請求總秒數
+            size (int): 回應內容位元組數
+        """
+        with self.lock:
+            self.records.append({
+                'time': time.time(),
+                'label': label,
+                'endpoint': endpoint,
+                'proxy': proxy,
+                'attempt': attempt,
+                'outcome': outcome,
+                'status': status,
+                'wait': round(wait, 4),
+                'ttfb': None if ttfb is None else round(ttfb, 4),
+                'total': None if total is None else round(total, 4),
+                'bytes': size,
+            })
+
+    def merge_json(self, path):
+        """
+        讀入另一個行程以 write_json 輸出的請求紀錄 (例如分片工作行程)
+
+        Returns:
+            int: 讀入的請求數
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            records = json.load(f).get('requests', [])
+        with self.lock:
+            self.records.extend(records)
+        return len(records)
+
+    def summarize(self, slowest_count=10):
+        """
+        彙整紀錄
+
+        Returns:
+            dict: 整體統計、延遲分布、各 proxy 統計、最慢的工作單位
+        """
+        with self.lock:
+            records = list(self.records)
+        totals = sorted(r['total'] for r in records if r['total'] is not None)
+        ttfbs = sorted(r['ttfb'] for r in records if r['ttfb'] is not None)
+        outcomes = {}
+        for r in records:
+            outcomes[r['outcome']] = outcomes.get(r['outcome'], 0) + 1
+
+        per_proxy = {}
+        for r in records:
+            stats = per_proxy.setdefault(r['proxy'] or 'direct', {'requests': 0, 'ok': 0, 'bytes': 0, 'totals': []})
+            stats['requests'] += 1
+            stats['ok'] += r['outcome'] == 'ok'
+            stats['bytes'] += r['bytes']
+            if r['total'] is not None:
+                stats['totals'].append(r['total'])
+        for stats in per_proxy.values():
+            proxy_totals = sorted(stats.pop('totals'))
+            stats['success_rate'] = round(stats['ok'] / stats['requests'], 4)
+            stats['p50'] = percentile(proxy_totals, 0.5)
+            stats['p95'] = percentile(proxy_totals, 0.95)
+
+        per_label = {}
+        for r in records:
+            stats = per_label.setdefault(r['label'], {'label': r['label'], 'requests': 0, 'seconds': 0.0, 'wait': 0.0})
+            stats['requests'] += 1
+            stats['seconds'] += r['total'] or 0.0
+            stats['wait'] += r['wait']
+        slowest = sorted(per_label.values(), key=lambda s: s['seconds'] + s['wait'], reverse=True)[:slowest_count]
+        for stats in slowest:
+            stats['seconds'] = round(stats['seconds'], 3)
+            stats['wait'] = round(stats['wait'], 3)
+
+        return {
+            'requests': len(records),
+            'retries': sum(1 for r in records if r['attempt'] > 0),
+            'outcomes': outcomes,
+            'bytes': sum(r['bytes'] for r in records),
+            'elapsed': round(time.time() - self.started_at, 3),
+            'request_seconds': round(sum(totals), 3),
+            'wait_seconds': round(sum(r['wait'] for r in records), 3),
+            'ttfb_p50': percentile(ttfbs, 0.5),
+            'ttfb_p99': percentile(ttfbs, 0.99),
+            'total_p50': percentile(totals, 0.5),
+            'total_p99': percentile(totals, 0.99),
+            'histogram': histogram(totals),
+            'per_proxy': per_proxy,
+            'slowest': slowest,
+        }
+
+    def print_summary(self, summary=None):
+        summary = summary or self.summarize()
+        if not summary['requests']:
+            return
+        print("================== 請求統計 ==================")
+        print(f"請求數: {summary['requests']} (重試 {summary['retries']}), 結果: {summary['outcomes']}, 下載 {summary['bytes'] / 1024:.1f} KB")
+        print(f"執行時間 {summary['elapsed']:.1f} 秒, 請求累計 {summary['request_seconds']:.1f} 秒, 等待速率限制累計 {summary['wait_seconds']:.1f} 秒")
+        print(f"TTFB p50 {summary['ttfb_p50'] * 1000:.0f} ms / p99 {summary['ttfb_p99'] * 1000:.0f} ms, "
+              f"總時間 p50 {summary['total_p50'] * 1000:.0f} ms / p99 {summary['total_p99'] * 1000:.0f} ms")
+        largest = max(count for _, count in summary['histogram']) or 1
+        for label, count in summary['histogram']:
+            print(f"  {label:>8} | {'#' * round(count * 40 / largest):<40} {count}")
+        print("各 proxy:")
+        for proxy, stats in sorted(summary['per_proxy'].items(), key=lambda item: item[1]['requests'], reverse=True):
+            print(f"  {proxy}: {stats['requests']} 次, 成功率 {stats['success_rate']:.0%}, p50 {stats['p50'] * 1000:.0f} ms, p95 {stats['p95'] * 1000:.0f} ms")
+        print("最慢的工作單位 (請求時間 + 等待時間):")
+        for stats in summary['slowest']:
+            print(f"  {stats['label']}: {stats['requests']} 次請求, 請求 {stats['seconds']:.2f} 秒, 等待 {stats['wait']:.2f} 秒")
+
+    def write_json(self, path, summary=None):
+        """
+        輸出摘要與每個請求的紀錄 (JSON)
+        """
+        summary = summary or self.summarize()
+        with self.lock:
+            records = list(self.records)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'summary': summary, 'requests': records}, f, ensure_ascii=False)
+        return path
+
+def metrics_path_for(output_filename):
+    """
+    取得請求統計 JSON 檔名稱 (與輸出檔放在一起)
+    """
+    base = output_filename[:-4] if output_filename.lower().endswith('.csv') else output_filename
+    return f"{base}_metrics.json"
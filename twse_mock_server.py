@@ -0,0 +1,252 @@
+import argparse
+import datetime
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# ----- 本地 TWSE 模擬伺服器 (效能測試用) -----
+# 提供 ETF/domestic、BWIBBU_d、STOCK_DAY、MI_INDEX 四個端點, 可注入延遲、5xx 錯誤、限流頁面與損壞的 JSON,
+# 讓抓取程式可以離線量測效能, 不必對 twse.com.tw 發送大量請求。
+#
+# 單獨執行: python twse_mock_server.py --port 8765 --latency 0.05 --error-rate 0.02
+
+THROTTLE_PAGE = "<html><body><h3>很抱歉，您的請求過於頻繁，請稍後再試。</h3></body></html>"
+
+def stock_codes(etf_count, stock_count):
+    """
+    產生固定的模擬股號 (ETF 為 00 開頭)
+    """
+    etf_codes = [f"00{50 + i:03d}" for i in range(etf_count)]
+    stock_codes_list = [str(1101 + i) for i in range(stock_count)]
+    return etf_codes, stock_codes_list
+
+def weekdays_in_month(year, month):
+    day = datetime.date(year, month, 1)
+    days = []
+    while day.month == month:
+        if day.weekday() < 5:
+            days.append(day)
+        day += datetime.timedelta(days=1)
+    return days
+
+def daily_values(stock_no, day):
+    """
+    依股號與日期產生固定的模擬行情 (同樣的輸入永遠得到同樣的結果)
+    """
+    seed = zlib.crc32(f"{stock_no}{day.isoformat()}".encode())
+    rng = random.Random(seed)
+    close = round(rng.uniform(10, 1000), 2)
+    change = round(rng.uniform(-5, 5), 2)
+    volume = rng.randint(1000, 50000000)
+    return {
+        'volume': f"{volume:,}",
+        'value': f"{int(volume * close):,}",
+        'open': f"{close - change:,.2f}",
+        'high': f"{close + abs(change):,.2f}",
+        'low': f"{close - abs(change) * 2:,.2f}",
+        'close': f"{close:,.2f}",
+        'sign': '+' if change >= 0 else '-',
+        'change': f"{abs(change):.2f}",
+        'trades': f"{rng.randint(10, 100000):,}",
+    }
+
+def roc_date(day):
+    return f"{day.year - 1911}/{day.month:02d}/{day.day:02d}"
+
+def stock_day_payload(stock_no, date_str):
+    """
+    STOCK_DAY 回應 (個股單月每日成交資訊)
+    """
+    year, month = int(date_str[:4]), int(date_str[4:6])
+    data = []
+    for day in weekdays_in_month(year, month):
+        v = daily_values(stock_no, day)
+        data.append([roc_date(day), v['volume'], v['value'], v['open'], v['high'], v['low'], v['close'],
+                     v['sign'] + v['change'], v['trades']])
+    return {
+        'stat': 'OK',
+        'date': date_str,
+        'title': f"{year - 1911}年{month:02d}月 {stock_no} 各日成交資訊",
+        'fields': ["日期", "成交股數", "成交金額", "開盤價", "最高價", "最低價", "收盤價", "漲跌價差", "成交筆數"],
+        'data': data,
+    }
+
+def mi_index_payload(all_codes, date_str):
+    """
+    MI_INDEX 回應 (全市場單日收盤行情), 週末回傳查無資料
+    """
+    day = datetime.date(int(date_str[:4]), int(date_str[4:6]), int(date_str[6:8]))
+    if day.weekday() >= 5:
+        return {'stat': '很抱歉，沒有符合條件的資料!'}
+    fields = ["證券代號", "證券名稱", "成交股數", "成交筆數", "成交金額", "開盤價", "最高價", "最低價", "收盤價",
+              "漲跌(+/-)", "漲跌價差", "最後揭示買價", "最後揭示買量", "最後揭示賣價", "最後揭示賣量", "本益比"]
+    data = []
+    for code in all_codes:
+        v = daily_values(code, day)
+        data.append([code, f"模擬{code}", v['volume'], v['trades'], v['value'], v['open'], v['high'], v['low'],
+                     v['close'], f"<p style= color:{'red' if v['sign'] == '+' else 'green'}>{v['sign']}</p>",
+                     v['change'], v['close'], "10", v['close'], "10", "12.34"])
+    return {
+        'stat': 'OK',
+        'date': date_str,
+        'tables': [
+            {'title': "價格指數(臺灣證券交易所)", 'fields': ["指數", "收盤指數"], 'data': []},
+            {'title': "每日收盤行情(全部(不含權證、牛熊證))", 'fields': fields, 'data': data},
+        ],
+    }
+
+class MockTwseServer:
+    """
+    模擬 TWSE 伺服器 (在背景執行緒執行)
+
+    Args:
+        port (int): 監聽埠號 (0 表示自動選擇)
+        latency (float): 每個請求平均延遲秒數 (實際為 0.5 ~ 1.5 倍隨機)
+        error_rate (float): 回傳 HTTP 500/503 的機率
+        throttle_rate (float): 回傳「很抱歉」限流頁面的機率
+        malformed_rate (float): 回傳損壞 JSON 的機率
+        etf_count (int): 模擬 ETF 數量
+        stock_count (int): 模擬個股數量
+        seed (int): 故障注入的亂數種子
+    """
+
+    def __init__(self, port=0, latency=0.0, error_rate=0.0, throttle_rate=0.0, malformed_rate=0.0,
+                 etf_count=50, stock_count=200, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.malformed_rate = malformed_rate
+        self.etf_codes, self.stock_codes = stock_codes(etf_count, stock_count)
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+        self.stats = {}
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self.thread = None
+
+    def _random(self):
+        with self.rng_lock:
+            return self.rng.random()
+
+    def _count(self, endpoint, outcome):
+        with self.stats_lock:
+            endpoint_stats = self.stats.setdefault(endpoint, {})
+            endpoint_stats[outcome] = endpoint_stats.get(outcome, 0) + 1
+
+    def snapshot_stats(self):
+        with self.stats_lock:
+            return json.loads(json.dumps(self.stats))
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1' # 支援 keep-alive, 與真實伺服器一樣可重複使用連線
+            disable_nagle_algorithm = True # 標頭與內容分開寫出, 避免 Nagle + delayed ACK 造成 40ms 延遲
+
+            def log_message(self, format, *args):
+                pass # 不輸出每個請求的 log
+
+            def _send(self, status, body, content_type, etag=None):
+                data = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                if etag:
+                    self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+                if parsed.path == '/__stats':
+                    self._send(200, json.dumps(server.snapshot_stats()), 'application/json')
+                    return
+
+                if parsed.path.endswith('/ETF/domestic'):
+                    endpoint = 'ETF'
+                    payload = {'status': 'ok', 'data': [[code, f"模擬ETF{code}", "2020/01/01"] for code in server.etf_codes]}
+                elif parsed.path.endswith('/BWIBBU_d'):
+                    endpoint = 'BWIBBU_d'
+                    payload = {'stat': 'OK', 'data': [[code, f"模擬{code}", "3.21", "2023", "15.2", "1.8", "112/4"] for code in server.stock_codes]}
+                elif parsed.path.endswith('/STOCK_DAY'):
+                    endpoint = 'STOCK_DAY'
+                    payload = stock_day_payload(query.get('stockNo', ''), query.get('date', '20240101'))
+                elif parsed.path.endswith('/MI_INDEX'):
+                    endpoint = 'MI_INDEX'
+                    payload = mi_index_payload(server.etf_codes + server.stock_codes, query.get('date', '20240102'))
+                else:
+                    server._count('unknown', '404')
+                    self._send(404, "not found", 'text/plain')
+                    return
+
+                if server.latency:
+                    time.sleep(server.latency * (0.5 + server._random()))
+
+                roll = server._random()
+                if roll < server.throttle_rate:
+                    server._count(endpoint, 'throttle')
+                    self._send(200, THROTTLE_PAGE, 'text/html; charset=utf-8')
+                    return
+                roll -= server.throttle_rate
+                if roll < server.error_rate:
+                    server._count(endpoint, '5xx')
+                    self._send(503 if roll < server.error_rate / 2 else 500, "server error", 'text/plain')
+                    return
+                roll -= server.error_rate
+                body = json.dumps(payload, ensure_ascii=False)
+                if roll < server.malformed_rate:
+                    server._count(endpoint, 'malformed')
+                    self._send(200, body[:len(body) // 2], 'application/json;charset=utf-8')
+                    return
+                etag = f'"{zlib.crc32(body.encode()):08x}"' # 內容相同時 ETag 相同, 支援條件請求
+                if self.headers.get('If-None-Match') == etag:
+                    server._count(endpoint, 'not_modified')
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                server._count(endpoint, 'ok')
+                self._send(200, body, 'application/json;charset=utf-8', etag)
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="本地 TWSE 模擬伺服器")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="平均延遲秒數")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="5xx 錯誤機率")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="限流頁面機率")
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help="損壞 JSON 機率")
+    parser.add_argument('--etf-count', type=int, default=50)
+    parser.add_argument('--stock-count', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    server = MockTwseServer(args.port, args.latency, args.error_rate, args.throttle_rate, args.malformed_rate,
+                            args.etf_count, args.stock_count, args.seed)
+    print(f"模擬 TWSE 伺服器執行中: {server.base_url} (Ctrl-C 結束)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
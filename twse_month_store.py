@@ -0,0 +1,174 @@
+import json
+import sqlite3
+import threading
+import time
+
+import twse_json
+
+# ----- STOCK_DAY 月資料本地儲存 (SQLite), 以 (股號, 年月) 為鍵 -----
+# 在月份結束後才抓取的資料不會再變動, 直接由本地讀取; 當月、從未抓過的月份,
+# 以及在月份還沒結束時抓取 (可能缺少月底交易日) 的月份才需要連網。
+# 依日期抓取模式另外紀錄已確認的非交易日 (MI_INDEX 查無資料且當天已經過去), 之後不再請求。
+
+DEFAULT_DB_PATH = "twse_stock_day.sqlite3"
+
+def is_closed_month(year_month):
+    """
+    判斷年月是否已結束 (早於本月)
+
+    Args:
+        year_month (str): 年月份，格式為YYYYMM (例如: 202401)
+
+    Returns:
+        bool: 早於本月則為 True
+    """
+    return year_month < time.strftime("%Y%m")
+
+def month_end_time(year_month):
+    """
+    月份結束的時間 (次月 1 日 00:00 本地時間)
+
+    Args:
+        year_month (str): 年月份，格式為YYYYMM (例如: 202401)
+
+    Returns:
+        float: epoch 秒數
+    """
+    year, month = int(year_month[:4]), int(year_month[4:6])
+    year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return time.mktime((year, month, 1, 0, 0, 0, 0, 0, -1))
+
+def is_final(year_month, fetched_at):
+    """
+    判斷在 fetched_at 抓取的月資料是否為完整的最終資料 (在月份結束之後才抓取)
+    """
+    return fetched_at >= month_end_time(year_month)
+
+def is_past_day(date_str):
+    """
+    判斷日期是否已經過去 (早於今天)
+
+    Args:
+        date_str (str): 日期，格式為YYYYMMDD (例如: 20240102)
+    """
+    return date_str < time.strftime("%Y%m%d")
+
+class MonthStore:
+    """
+    以 SQLite 儲存每個 (股號, 年月) 的 STOCK_DAY 原始資料列 (執行緒安全)
+
+    Args:
+        db_path (str): SQLite 檔案路徑
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30) # 多個分片行程同時寫入時等待鎖定
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS stock_day ("
+            " stock_no TEXT NOT NULL,"
+            " year_month TEXT NOT NULL,"
+            " rows_json TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL,"
+            " PRIMARY KEY (stock_no, year_month))"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS closed_day ("
+            " date TEXT PRIMARY KEY," # YYYYMMDD
+            " fetched_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def get(self, stock_code, year_month):
+        """
+        讀取已儲存的月資料
+
+        Returns:
+            list: 每日成交資料列表, 若尚未儲存則返回 None
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT rows_json FROM stock_day WHERE stock_no = ? AND year_month = ?",
+                (stock_code, year_month)
+            ).fetchone()
+        if row is None:
+            return None
+        return twse_json.loads(row[0])
+
+    def get_closed(self, stock_code, year_month):
+        """
+        只有在月份結束後才抓取的資料才從本地讀取; 當月, 或在月份結束前抓取的資料一律返回 None 讓呼叫端重新抓取 (並覆蓋)
+        """
+        if not is_closed_month(year_month):
+            return None
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT rows_json, fetched_at FROM stock_day WHERE stock_no = ? AND year_month = ?",
+                (stock_code, year_month)
+            ).fetchone()
+        if row is None or not is_final(year_month, row[1]):
+            return None
+        return twse_json.loads(row[0])
+
+    def is_partial(self, stock_code, year_month):
+        """
+        本地資料是否在月份結束前抓取 (可能缺少之後的交易日, 需要重新抓取); 沒有本地資料時返回 False
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT fetched_at FROM stock_day WHERE stock_no = ? AND year_month = ?",
+                (stock_code, year_month)
+            ).fetchone()
+        return row is not None and not is_final(year_month, row[0])
+
+    def put(self, stock_code, year_month, daily_data):
+        """
+        儲存 (或覆蓋) 月資料
+        """
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO stock_day (stock_no, year_month, rows_json, fetched_at) VALUES (?, ?, ?, ?)",
+                (stock_code, year_month, json.dumps(daily_data, ensure_ascii=False), time.time())
+            )
+            self.conn.commit()
+
+    def put_closed_day(self, date_str):
+        """
+        紀錄已確認的非交易日 (MI_INDEX 查無資料); 今天以後的日期可能只是還沒收盤, 不紀錄
+
+        Returns:
+            bool: 是否已紀錄
+        """
+        if not is_past_day(date_str):
+            return False
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO closed_day (date, fetched_at) VALUES (?, ?)",
+                (date_str, time.time())
+            )
+            self.conn.commit()
+        return True
+
+    def closed_days(self, dates):
+        """
+        日期列表中已確認的非交易日
+
+        Args:
+            dates (list): 日期列表，格式為YYYYMMDD
+
+        Returns:
+            set: 已確認的非交易日
+        """
+        if not dates:
+            return set()
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT date FROM closed_day WHERE date BETWEEN ? AND ?", (min(dates), max(dates))
+            ).fetchall()
+        return {row[0] for row in rows} & set(dates)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,98 @@
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError: # 具型別輸出為選用功能, 未安裝 pandas 時只能輸出原始字串
+    np = None
+    pd = None
+
+# ----- STOCK_DAY 資料列的向量化型別轉換 -----
+# TWSE 回傳的欄位都是字串 ("1,234,567", "X0.50", "--", 民國日期 "113/01/02"),
+# 這裡一次轉換一整批資料列, 輸出 int64 成交量、float 價格 ("--" 為 NaN)、帶正負號的漲跌價差與 ISO 日期。
+
+DATE_COLUMN = "日期"
+INT_COLUMNS = ["成交股數", "成交金額", "成交筆數"]
+FLOAT_COLUMNS = ["開盤價", "最高價", "最低價", "收盤價"]
+CHANGE_COLUMN = "漲跌價差"
+
+# 每個欄位的型別 (供 Parquet 輸出建立 schema), 未列出的欄位維持字串
+TYPED_COLUMN_KINDS = {DATE_COLUMN: 'date', CHANGE_COLUMN: 'float'}
+TYPED_COLUMN_KINDS.update({column: 'int' for column in INT_COLUMNS})
+TYPED_COLUMN_KINDS.update({column: 'float' for column in FLOAT_COLUMNS})
+
+def build_daily_rows(daily_data, stock_code, stock_name, stock_category):
+    """
+    將 STOCK_DAY 資料列加上股號、名稱、類別, 轉成 CSV 輸出資料列
+
+    直接在 JSON 解析出的資料列中插入三個欄位 (不另外建立新的列表, 也不逐欄位複製),
+    因此 daily_data 會被修改; 超過 9 個欄位的部分 (例如註記) 與原本一樣捨棄。
+
+    Args:
+        daily_data (list): STOCK_DAY 的 data (每列 9 個欄位: 日期 + 8 個數值欄位)
+        stock_code (str): 股號
+        stock_name (str): 股票名稱
+        stock_category (str): 股票類別
+
+    Returns:
+        list: 每日成交資料列 (欄位順序同 CSV 標題)
+    """
+    stock_fields = (stock_code, stock_name, stock_category)
+    for day_data in daily_data:
+        if len(day_data) > 9:
+            del day_data[9:]
+        day_data[1:1] = stock_fields
+    return daily_data
+
+def is_available():
+    """
+    是否已安裝 numpy/pandas (具型別輸出需要)
+    """
+    return pd is not None
+
+def roc_to_iso_dates(roc_dates):
+    """
+    將民國日期字串 (例如 "113/01/02") 轉成日期 (2024-01-02)
+
+    Args:
+        roc_dates (pandas.Series): 民國日期字串
+
+    Returns:
+        pandas.Series: datetime64 日期, 無法解析者為 NaT
+    """
+    parts = roc_dates.str.replace(r"[^0-9/]", "", regex=True).str.split("/", expand=True)
+    if parts.shape[1] < 3:
+        return pd.Series(pd.NaT, index=roc_dates.index, dtype="datetime64[ns]")
+    years = pd.to_numeric(parts[0], errors="coerce") + 1911
+    iso_dates = years.astype("Int64").astype(str) + "-" + parts[1] + "-" + parts[2]
+    return pd.to_datetime(iso_dates, format="%Y-%m-%d", errors="coerce")
+
+def to_number(values):
+    """
+    移除千分位逗號、除權息標記 "X" 與空白後轉成數字, "--" 等無法解析的值為 NaN
+    """
+    cleaned = values.str.replace(r"[,X\s]", "", regex=True)
+    return pd.to_numeric(cleaned, errors="coerce")
+
+def parse_daily_rows(rows, columns):
+    """
+    將一批每日成交資料列一次轉成具型別的 DataFrame
+
+    Args:
+        rows (list): 資料列 (每列欄位順序同 columns, 值皆為 TWSE 原始字串)
+        columns (list): 欄位名稱
+
+    Returns:
+        pandas.DataFrame: 日期為 datetime64, 成交股數/成交金額/成交筆數為 Int64,
+                          價格與漲跌價差為 float64 ("--" 為 NaN), 其他欄位維持字串
+    """
+    if pd is None:
+        raise RuntimeError("具型別輸出需要安裝 numpy 與 pandas (pip install numpy pandas)")
+    df = pd.DataFrame(rows, columns=columns, dtype=object)
+    if DATE_COLUMN in df:
+        df[DATE_COLUMN] = roc_to_iso_dates(df[DATE_COLUMN].astype(str))
+    for column in INT_COLUMNS:
+        if column in df:
+            df[column] = to_number(df[column].astype(str)).round().astype("Int64")
+    for column in FLOAT_COLUMNS + [CHANGE_COLUMN]:
+        if column in df:
+            df[column] = to_number(df[column].astype(str)).astype(np.float64)
+    return df
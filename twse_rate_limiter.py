@@ -0,0 +1,132 @@
+import threading
+import time
+
+# ----- 全域請求速率限制 (token bucket), 供所有 TWSE 抓取執行緒共用 -----
+
+class RateLimiter:
+    """
+    Token bucket 速率限制器 (執行緒安全)
+
+    每秒補充 rate 個 token, 最多累積 burst 個; 每次請求前呼叫 acquire() 取得一個 token,
+    token 不足時會等待, 讓所有執行緒合計的請求速率不超過 rate。
+
+    Args:
+        rate (float): 每秒允許的請求數 (例如 0.5 代表每 2 秒一次)
+        burst (int): 可累積的最大 token 數 (允許的瞬間突發請求數)
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.tokens = float(self.burst)
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def acquire(self):
+        """
+        取得一個 token, 若目前沒有 token 則等待到可用為止
+        """
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_time = (1 - self.tokens) / self.rate
+            time.sleep(wait_time)
+
+    def report_success(self):
+        """
+        回報一次成功的請求 (固定速率時不做任何事)
+        """
+
+    def report_throttled(self):
+        """
+        回報一次限流回應 (固定速率時不做任何事)
+        """
+
+# ----- 依 TWSE 回應自動調整速率 -----
+
+THROTTLE_STATUS_CODES = (403, 429)
+THROTTLE_TEXT = "很抱歉"
+
+def is_throttle_response(status_code, content_type, text):
+    """
+    判斷回應是否為 TWSE 的限流/封鎖回應
+
+    HTTP 403/429, 或回傳 HTML (非 JSON) 且內容含「很抱歉」的頁面都視為限流。
+    注意 JSON 回應中 stat 為「很抱歉，沒有符合條件的資料!」是正常的查無資料, 不算限流。
+
+    Args:
+        status_code (int): HTTP 狀態碼
+        content_type (str): Content-Type 標頭
+        text (str): 回應內容
+
+    Returns:
+        bool: 是限流回應則為 True
+    """
+    if status_code in THROTTLE_STATUS_CODES:
+        return True
+    if 'json' not in (content_type or '').lower() and THROTTLE_TEXT in (text or ''):
+        return True
+    return False
+
+class AdaptiveRateLimiter(RateLimiter):
+    """
+    會依伺服器回應自動調整速率的 token bucket (AIMD)
+
+    遇到限流時速率乘上 decrease_factor 並清空 token; 連續成功 increase_after 次後
+    速率增加 increase_step, 讓整體速率自動停在伺服器可接受的最高值附近。
+
+    Args:
+        rate (float): 初始每秒請求數
+        min_rate (float): 最低每秒請求數
+        max_rate (float): 最高每秒請求數
+        burst (int): 可累積的最大 token 數
+        decrease_factor (float): 限流時速率的縮減倍率
+        increase_step (float): 每次回升增加的每秒請求數
+        increase_after (int): 連續成功多少次後回升一次
+
+    Raises:
+        ValueError: 不符合 min_rate <= rate <= max_rate
+    """
+
+    def __init__(self, rate, min_rate=0.05, max_rate=5.0, burst=1,
+                 decrease_factor=0.5, increase_step=0.05, increase_after=20):
+        if not min_rate <= rate <= max_rate:
+            raise ValueError(f"初始速率 {rate} 必須介於 min_rate {min_rate} 與 max_rate {max_rate} 之間")
+        super().__init__(rate, burst)
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate)
+        self.decrease_factor = decrease_factor
+        self.increase_step = increase_step
+        self.increase_after = increase_after
+        self.success_streak = 0
+
+    def report_success(self):
+        """
+        回報一次成功的請求, 持續成功時慢慢調高速率
+        """
+        with self.lock:
+            self.success_streak += 1
+            if self.success_streak >= self.increase_after:
+                self._refill()
+                self.rate = max(self.rate, min(self.max_rate, self.rate + self.increase_step)) # 成功只會調高速率, 不會降低
+                self.success_streak = 0
+
+    def report_throttled(self):
+        """
+        回報一次限流回應, 立即降低速率並清空已累積的 token
+        """
+        with self.lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self.tokens = 0.0
+            self.success_streak = 0
+            new_rate = self.rate
+        print(f"偵測到 TWSE 限流回應，請求速率降為每秒 {new_rate:.3f} 次")
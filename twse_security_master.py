@@ -0,0 +1,93 @@
+import json
+import os
+import time
+
+# ----- 證券主檔快取: ETF 列表 (ETF/domestic) 與個股列表 (BWIBBU_d) 存成本地 JSON, 在有效期限內不再重新抓取 -----
+
+DEFAULT_CACHE_PATH = "twse_security_master.json"
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+
+def build_stock_info(etf_list, individual_stock_list):
+    """
+    將 ETF 與個股 API 資料整理成股票資訊列表
+
+    Returns:
+        list: [{'股號', '股票名稱', '股票類別'}, ...]
+    """
+    all_stock_info = []
+    for etf_info in etf_list or []:
+        all_stock_info.append({'股號': etf_info[0], '股票名稱': etf_info[1], '股票類別': 'ETF'})
+    for stock_info in individual_stock_list or []:
+        all_stock_info.append({'股號': stock_info[0], '股票名稱': stock_info[1], '股票類別': '個股'})
+    return all_stock_info
+
+def build_index(all_stock_info):
+    """
+    建立 股號 -> 股票資訊 的索引 (查詢股號不需逐一比對)
+    """
+    return {stock_info['股號']: stock_info for stock_info in all_stock_info}
+
+def read_cache(cache_path):
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"讀取證券主檔快取 {cache_path} 時發生錯誤: {e}")
+        return None
+
+def write_cache(cache_path, all_stock_info, etf_count, stock_count):
+    try:
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'fetched_at': time.time(),
+                'etf_count': etf_count,
+                'stock_count': stock_count,
+                'stocks': all_stock_info,
+            }, f, ensure_ascii=False)
+    except OSError as e:
+        print(f"寫入證券主檔快取 {cache_path} 時發生錯誤: {e}")
+
+def load_security_master(fetch_etf, fetch_stock, cache_path=DEFAULT_CACHE_PATH, ttl_seconds=DEFAULT_TTL_SECONDS, refresh=False):
+    """
+    取得證券主檔: 快取在有效期限內直接使用, 否則重新抓取並更新快取
+
+    兩個 API 都抓取失敗時, 若有過期的快取則仍使用快取。
+
+    Args:
+        fetch_etf (callable): 抓取 ETF 列表的函式 (例如 get_etf_data)
+        fetch_stock (callable): 抓取個股列表的函式 (例如 get_stock_data)
+        cache_path (str): 快取檔案路徑
+        ttl_seconds (float): 快取有效秒數
+        refresh (bool): True 時忽略快取強制重新抓取
+
+    Returns:
+        tuple: (股票資訊列表, 股號索引 dict)
+    """
+    cache = read_cache(cache_path)
+    if cache and not refresh and time.time() - cache.get('fetched_at', 0) < ttl_seconds:
+        all_stock_info = cache['stocks']
+        print(f"使用證券主檔快取 {cache_path} (ETF {cache.get('etf_count', 0)} 檔, 個股 {cache.get('stock_count', 0)} 檔)")
+        return all_stock_info, build_index(all_stock_info)
+
+    etf_list = fetch_etf()
+    if not etf_list:
+        print("無法取得 ETF 列表資訊")
+    individual_stock_list = fetch_stock()
+    if not individual_stock_list:
+        print("無法取得個股資訊")
+
+    if not etf_list and not individual_stock_list:
+        if cache:
+            print(f"改用過期的證券主檔快取 {cache_path}")
+            return cache['stocks'], build_index(cache['stocks'])
+        return [], {}
+
+    all_stock_info = build_stock_info(etf_list, individual_stock_list)
+    etf_count = len(etf_list or [])
+    stock_count = len(individual_stock_list or [])
+    print(f"已取得證券主檔: ETF {etf_count} 檔, 個股 {stock_count} 檔")
+    if etf_list and individual_stock_list: # 只有兩份資料都完整時才寫入快取
+        write_cache(cache_path, all_stock_info, etf_count, stock_count)
+    return all_stock_info, build_index(all_stock_info)
@@ -0,0 +1,101 @@
+import csv
+import json
+import multiprocessing
+import os
+import sys
+
+from twse_batch import normalize_date
+
+# ----- 多行程分片抓取: 將股票清單分給多個工作行程, 每個行程有自己的 proxy 子集與速率額度, 最後合併輸出 -----
+# 每個工作行程就是一次一般的批次模式執行 (--stocks @清單檔 --output 分片檔), 因此可沿用進度紀錄、月資料儲存與請求統計;
+# JSON 解析與資料列建立分散到多個 CPU 核心上。
+
+def partition(items, shard_count):
+    """
+    依序輪流分配成 shard_count 份 (略過空的分片)
+    """
+    shards = [items[i::shard_count] for i in range(shard_count)]
+    return [shard for shard in shards if shard]
+
+def shard_path(filename, shard_index, suffix=".csv"):
+    """
+    取得分片檔名稱 (例如 data.csv -> data.shard0.csv)
+    """
+    base = filename[:-4] if filename.lower().endswith('.csv') else filename
+    return f"{base}.shard{shard_index}{suffix}"
+
+def write_shard_inputs(filename, shard_index, stock_codes, proxy_list):
+    """
+    寫出工作行程的股號清單檔與 proxy 列表檔
+
+    Returns:
+        tuple: (股號清單檔路徑, proxy 列表檔路徑 (沒有 proxy 時為 None))
+    """
+    codes_path = shard_path(filename, shard_index, ".stocks.txt")
+    with open(codes_path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(stock_codes) + "\n")
+    proxies_path = None
+    if proxy_list:
+        proxies_path = shard_path(filename, shard_index, ".proxies.json")
+        with open(proxies_path, 'w', encoding='utf-8') as f:
+            json.dump(proxy_list, f, ensure_ascii=False)
+    return codes_path, proxies_path
+
+def run_worker(script_main, argv):
+    """
+    工作行程進入點: 以指定的命令列參數執行一次批次抓取
+    """
+    sys.argv = argv
+    script_main()
+
+def run_workers(script_main, argv_list):
+    """
+    啟動所有工作行程並等待結束
+
+    Returns:
+        list: 各工作行程的結束代碼
+    """
+    processes = [multiprocessing.Process(target=run_worker, args=(script_main, argv)) for argv in argv_list]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt: # 工作行程也會收到 Ctrl-C, 各自儲存進度後結束
+        for process in processes:
+            process.join()
+        raise
+    return [process.exitcode for process in processes]
+
+def iter_part_rows(part_filenames, existing_units=None, batch_size=5000):
+    """
+    依序讀取分片 CSV 的資料列 (略過標題), 並略過輸出檔中已經有的 (股號, 日期)
+
+    Args:
+        part_filenames (list): 分片 CSV 檔名列表
+        existing_units (dict, optional): twse_batch.scan_existing_output 的回傳值
+        batch_size (int): 每批資料列數
+
+    Yields:
+        list: 資料列批次
+    """
+    existing_units = existing_units or {}
+    batch = []
+    for part_filename in part_filenames:
+        if not os.path.exists(part_filename):
+            continue
+        with open(part_filename, 'r', newline='', encoding='utf-8-sig') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                if len(row) < 2:
+                    continue
+                iso_date = normalize_date(row[0])
+                if iso_date and iso_date in existing_units.get((row[1], iso_date[:4] + iso_date[5:7]), ()):
+                    continue
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+    if batch:
+        yield batch
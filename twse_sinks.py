@@ -0,0 +1,147 @@
+import csv
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError: # Parquet 輸出為選用功能, 未安裝 pyarrow 時只能輸出 CSV
+    pa = None
+    pq = None
+
+from twse_parser import TYPED_COLUMN_KINDS
+
+# ----- 串流輸出: 每個月資料解析完就寫出, 依批次 flush, 記憶體用量不隨抓取月份數增加 -----
+# 每批資料可以是原始字串資料列 (list), 或經 twse_parser 轉換後的具型別 DataFrame。
+
+class CsvSink:
+    """
+    CSV 輸出 (格式與原本 save_to_csv 相同: utf-8-sig 編碼, 第一列為欄位標題)
+
+    Args:
+        filename (str): CSV 檔案名稱
+        headers_csv (list): CSV 欄位標題
+        append (bool): True 時接續寫入既有檔案 (不重複寫標題)
+    """
+
+    def __init__(self, filename, headers_csv, append=False):
+        self.filename = filename
+        write_header = not (append and os.path.exists(filename) and os.path.getsize(filename) > 0)
+        self.file = open(filename, 'a' if append else 'w', newline='', encoding='utf-8-sig')
+        self.writer = csv.writer(self.file)
+        if write_header:
+            self.writer.writerow(headers_csv)
+
+    def write_batch(self, rows):
+        if hasattr(rows, 'to_csv'): # 具型別 DataFrame: 日期輸出為 ISO 格式, NaN 輸出為空白
+            rows.to_csv(self.file, header=False, index=False, lineterminator='\r\n', date_format='%Y-%m-%d')
+        else:
+            self.writer.writerows(rows)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class ParquetSink:
+    """
+    Parquet 輸出 (需安裝 pyarrow), 每個批次寫成一個 row group
+
+    Args:
+        filename (str): Parquet 檔案名稱
+        headers_csv (list): 欄位名稱
+        append (bool): True 時保留既有檔案內容 (逐個 row group 複製到新檔後再接續寫入)
+        typed (bool): True 時依 twse_parser 的欄位型別建立 schema (date32 / int64 / float64), 否則欄位皆為字串
+
+    Raises:
+        RuntimeError: 未安裝 pyarrow, 或接續寫入時既有檔案的 schema 與本次不同 (例如前次未加 --typed)
+    """
+
+    def __init__(self, filename, headers_csv, append=False, typed=False):
+        if pa is None:
+            raise RuntimeError("輸出 Parquet 需要安裝 pyarrow (pip install pyarrow)")
+        self.filename = filename
+        self.headers_csv = list(headers_csv)
+        self.typed = typed
+        arrow_types = {'date': pa.date32(), 'int': pa.int64(), 'float': pa.float64()}
+        self.schema = pa.schema([
+            (name, arrow_types[TYPED_COLUMN_KINDS[name]] if typed and name in TYPED_COLUMN_KINDS else pa.string())
+            for name in self.headers_csv
+        ])
+        old_filename = None
+        if append and os.path.exists(filename):
+            existing_schema = pq.read_schema(filename)
+            if not existing_schema.equals(self.schema, check_metadata=False):
+                raise RuntimeError(
+                    f"既有檔案 {filename} 的欄位型別與本次輸出不同 ({'有' if typed else '未'}使用 --typed), "
+                    "無法接續寫入; 請改用相同的 --typed 設定, 或另外指定輸出檔名"
+                )
+            old_filename = filename + ".old"
+            os.replace(filename, old_filename)
+        self.writer = None
+        try:
+            self.writer = pq.ParquetWriter(filename, self.schema)
+            if old_filename:
+                for batch in pq.ParquetFile(old_filename).iter_batches():
+                    self.writer.write_batch(batch)
+        except Exception: # 複製失敗時還原既有檔案, 不留下只寫了一半的新檔
+            if self.writer is not None:
+                self.writer.close()
+            if old_filename:
+                os.replace(old_filename, filename)
+            elif os.path.exists(filename):
+                os.remove(filename)
+            raise
+        if old_filename:
+            os.remove(old_filename)
+
+    def write_batch(self, rows):
+        if hasattr(rows, 'to_csv'): # 具型別 DataFrame
+            self.writer.write_table(pa.Table.from_pandas(rows, preserve_index=False).cast(self.schema))
+            return
+        columns = list(zip(*rows))
+        table = pa.Table.from_arrays(
+            [pa.array(column, type=pa.string()) for column in columns],
+            schema=self.schema
+        )
+        self.writer.write_table(table)
+
+    def close(self):
+        self.writer.close()
+
+class BatchedRowWriter:
+    """
+    暫存資料列, 累積到 batch_size 筆時一次寫入所有輸出 (CSV / Parquet)
+
+    Args:
+        sinks (list): 輸出物件列表 (CsvSink / ParquetSink)
+        batch_size (int): 每批寫出的資料列數
+        on_flush (callable, optional): 每次寫出後呼叫, 用來通知呼叫端這批資料已落地 (例如更新進度紀錄)
+        transform (callable, optional): 寫出前對整批資料列做的轉換 (例如 twse_parser 的向量化型別轉換)
+    """
+
+    def __init__(self, sinks, batch_size=5000, on_flush=None, transform=None):
+        self.sinks = sinks
+        self.batch_size = batch_size
+        self.on_flush = on_flush
+        self.transform = transform
+        self.buffer = []
+        self.rows_written = 0
+
+    def write_rows(self, rows):
+        self.buffer.extend(rows)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            batch = self.transform(self.buffer) if self.transform else self.buffer
+            for sink in self.sinks:
+                sink.write_batch(batch)
+            self.rows_written += len(self.buffer)
+            self.buffer = []
+        if self.on_flush:
+            self.on_flush()
+
+    def close(self):
+        self.flush()
+        for sink in self.sinks:
+            sink.close()